@@ -1,5 +1,7 @@
-import json
+import os
 import time
+import asyncio
+import contextlib
 import typing as T
 from uuid import UUID
 import edgedb
@@ -18,35 +20,60 @@ from fastgql import (
 )
 from dotenv import load_dotenv
 
+try:
+    import orjson
+except ImportError:
+    import json as orjson
+
 load_dotenv()
 
-edgedb_client = edgedb.create_async_client()
+# the client keeps a pool of connections that each cache their prepared queries,
+# so it only needs to be big enough for the fan out of one request
+edgedb_client = edgedb.create_async_client(
+    concurrency=int(os.getenv("EDGEDB_CONCURRENCY", 50))
+)
+
+# set TRACE_QUERIES=1 to print how long each query takes
+TRACE_QUERIES = os.getenv("TRACE_QUERIES") == "1"
+
+
+@contextlib.contextmanager
+def trace(name: str) -> T.Iterator[None]:
+    if not TRACE_QUERIES:
+        yield
+        return
+    start = time.perf_counter_ns()
+    yield
+    print(f"[{name}] took {(time.perf_counter_ns() - start) / 1_000_000:.2f} ms")
+
 
 Contents = list[T.Union["Movie", "Show"]]
 
+ModelType = T.TypeVar("ModelType", bound=GQL)
+
+
+def construct(model_cls: T.Type[ModelType], data: dict[str, T.Any]) -> ModelType:
+    # this data comes from edgedb, so there is no need to validate it again
+    model = model_cls.model_construct(**data)
+    model._data = data
+    return model
+
 
 def parse_raw_content(raw_content: list[dict, T.Any]) -> Contents:
     w_list: Contents = []
     for item in raw_content:
-        if item["typename"] == "default::Movie":
-            if movie := item.get("Movie"):
-                w_list.append(Movie(**movie))
-        elif item["typename"] == "default::Show":
-            if show := item.get("Show"):
-                w_list.append(Show(**show))
+        if model_cls := content_types.get(item["typename"]):
+            if data := item.get(model_cls.__name__):
+                w_list.append(construct(model_cls, data))
     return w_list
 
 
 async def query_required_single_json(
     name: str, query: str, **variables
 ) -> dict[str, T.Any]:
-    start = time.time()
-    res = json.loads(
-        await edgedb_client.query_required_single_json(query=query, **variables)
-    )
-    took_ms = round((time.time() - start) * 1_000, 2)
-    print(f"[{name}] took {took_ms} ms")
-    return res
+    with trace(name):
+        res = await edgedb_client.query_required_single_json(query=query, **variables)
+    return orjson.loads(res)
 
 
 class AccountPageInfo(GQL):
@@ -72,10 +99,6 @@ def update_watchlist(child_qb: QueryBuilder, limit: int) -> None:
 
 
 class Account(GQL):
-    def __init__(self, **data):
-        super().__init__(**data)
-        self._data = data
-
     id: T.Annotated[UUID, Property(db_name="id")] = None
     username: T.Annotated[str, Property(db_name="username")] = None
 
@@ -86,17 +109,13 @@ class Account(GQL):
 
 
 class Content(GQLInterface):
-    def __init__(self, **data):
-        super().__init__(**data)
-        self._data = data
-
     id: T.Annotated[UUID, Property(db_name="id")] = None
     title: T.Annotated[str, Property(db_name="title")] = None
 
     async def actors(
         self, info: Info
     ) -> T.Annotated[list["Person"], Link(db_name="actors")]:
-        return [Person(**p) for p in self._data[info.path[-1]]]
+        return [construct(Person, p) for p in self._data[info.path[-1]]]
 
 
 class Movie(Content):
@@ -109,26 +128,25 @@ class Show(Content):
     async def seasons(
         self, info: Info
     ) -> T.Annotated[list["Season"], Link(db_name="<show[is Season]")]:
-        return [Season(**s) for s in self._data[info.path[-1]]]
+        return [construct(Season, s) for s in self._data[info.path[-1]]]
 
 
-class Season(GQL):
-    def __init__(self, **data):
-        super().__init__(**data)
-        self._data = data
+# edgedb typename to the model it is built as
+content_types: dict[str, T.Type[Content]] = {
+    "default::Movie": Movie,
+    "default::Show": Show,
+}
 
+
+class Season(GQL):
     id: T.Annotated[UUID, Property(db_name="id")] = None
     number: T.Annotated[int, Property(db_name="number")] = None
 
     async def show(self, info: Info) -> T.Annotated[Show, Link(db_name="show")]:
-        return Show(**self._data[info.path[-1]])
+        return construct(Show, self._data[info.path[-1]])
 
 
 class Person(GQL):
-    def __init__(self, **data):
-        super().__init__(**data)
-        self._data = data
-
     id: T.Annotated[UUID, Property(db_name="id")] = None
     name: T.Annotated[str, Property(db_name="name")] = None
 
@@ -148,11 +166,12 @@ class Query(GQL):
     ) -> Account:
         s, v = qb.build()
         q = f"""select Account {s} filter .username = <str>$username"""
-        print(q)
+        if TRACE_QUERIES:
+            print(q)
         account_d = await query_required_single_json(
             name="account_by_username", query=q, username=username, **v
         )
-        return Account(**account_d)
+        return construct(Account, account_d)
 
     @staticmethod
     async def account_connection(
@@ -180,33 +199,41 @@ class Query(GQL):
             filter_s = ""
         qb.add_variables(variables, replace=False)
         s, v = qb.build()
+        # fetch one extra account to know if there is a next page
         q = f"""
         with
-            all_accounts := (select Account),
             _first := <int16>$first,
-            accounts := (select all_accounts {filter_s}order by .username desc limit _first),
         select {{
-            total_count := count(all_accounts),
-            accounts := accounts {s}
+            accounts := (select Account {s} {filter_s}order by .username desc limit _first + 1)
         }}
         """
-        connection_d = await query_required_single_json(
-            name="account_connection", query=q, **v
-        )
-        total_count = connection_d["total_count"]
-        _accounts = [Account(**d) for d in connection_d["accounts"]]
-        connection = AccountConnection(
+        proms = [query_required_single_json(name="account_connection", query=q, **v)]
+        if node_from_path(node=info.node, path=["total_count"]):
+            # counting every account is a full scan, so only do it when asked
+            # and at the same time as the page query
+            proms.append(
+                query_required_single_json(
+                    name="total_count", query="select {total_count := count(Account)}"
+                )
+            )
+        connection_d, *count_d = await asyncio.gather(*proms)
+        # total_count is left unset when it was not selected, so it is never read
+        extra = {"total_count": count_d[0]["total_count"]} if count_d else {}
+        _accounts = [construct(Account, d) for d in connection_d["accounts"]]
+        has_next_page = len(_accounts) > first
+        _accounts = _accounts[:first]
+        connection = AccountConnection.model_construct(
             page_info=AccountPageInfo(
-                has_next_page=len(_accounts) == first and total_count > first,
+                has_next_page=has_next_page,
                 has_previous_page=after is not None,
                 start_cursor=_accounts[0].username if _accounts else None,
                 end_cursor=_accounts[-1].username if _accounts else None,
             ),
-            total_count=total_count,
             edges=[
                 AccountEdge(node=account, cursor=account.username)
                 for account in _accounts
             ],
+            **extra,
         )
         return connection
 
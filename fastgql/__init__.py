@@ -2,6 +2,7 @@ from .gql_models import GQL, GQLInput, GQLError, GQLConfigDict, GQLInterface
 from .schema_builder import SchemaBuilder
 from .info import Info
 from .context import BaseContext
+from .dataloader import DataLoader
 from .depends import Depends
 from .query_builders.edgedb.logic import get_qb
 from .query_builders.edgedb.query_builder import QueryBuilder, ChildEdge
@@ -28,6 +29,7 @@ __all__ = [
     "GQLConfigDict",
     "Info",
     "BaseContext",
+    "DataLoader",
     "Depends",
     "get_qb",
     "QueryBuilder",
@@ -2,9 +2,21 @@ import typing as T
 from fastapi import Request, Response, BackgroundTasks
 from fastgql import GQLError
 from fastgql.gql_ast.models import Node
+from fastgql.dataloader import DataLoader, BatchLoadFn
 
 
 class BaseContext:
+    # subclasses without __slots__ still get a __dict__ for their own attributes
+    __slots__ = (
+        "request",
+        "response",
+        "background_tasks",
+        "errors",
+        "variables",
+        "overwrite_return_value_map",
+        "loaders",
+    )
+
     def __init__(
         self,
         request: Request,
@@ -20,3 +32,11 @@ class BaseContext:
         self.variables = variables
 
         self.overwrite_return_value_map: dict[Node, T.Any] = {}
+        self.loaders: dict[T.Hashable, DataLoader] = {}
+
+    def loader(self, key: T.Hashable, load_fn: BatchLoadFn) -> DataLoader:
+        """gets or creates the DataLoader for key, scoped to this request"""
+        if (loader := self.loaders.get(key)) is None:
+            loader = DataLoader(load_fn=load_fn)
+            self.loaders[key] = loader
+        return loader
@@ -0,0 +1,68 @@
+import typing as T
+import asyncio
+
+K = T.TypeVar("K", bound=T.Hashable)
+V = T.TypeVar("V")
+
+BatchLoadFn = T.Callable[[list[K]], T.Awaitable[T.Sequence[V]]]
+
+
+class DataLoader(T.Generic[K, V]):
+    """Collects the keys loaded during one event loop tick and fetches them with a single
+    call to load_fn. load_fn must return the values in the same order as the keys."""
+
+    def __init__(self, load_fn: BatchLoadFn[K, V]):
+        self.load_fn = load_fn
+        self.futures: dict[K, asyncio.Future[V]] = {}
+        self._queue: list[K] = []
+        self._tasks: set[asyncio.Task] = set()
+
+    def load(self, key: K) -> asyncio.Future[V]:
+        """every caller of a key shares one future, so each gets it shielded and
+        cancelling one caller does not cancel the result for the others"""
+        if fut := self.futures.get(key):
+            return asyncio.shield(fut)
+        loop = asyncio.get_running_loop()
+        fut = loop.create_future()
+        self.futures[key] = fut
+        if not self._queue:
+            # every resolver gathered alongside this one gets to queue its key first
+            loop.call_soon(self._dispatch)
+        self._queue.append(key)
+        return asyncio.shield(fut)
+
+    async def load_many(self, keys: T.Iterable[K]) -> list[V]:
+        return list(await asyncio.gather(*[self.load(key) for key in keys]))
+
+    def _dispatch(self) -> None:
+        keys, self._queue = self._queue, []
+        task = asyncio.ensure_future(self._load_batch(keys))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _load_batch(self, keys: list[K]) -> None:
+        try:
+            values = await self.load_fn(keys)
+            if len(values) != len(keys):
+                raise Exception(
+                    f"load_fn returned {len(values)} values for {len(keys)} keys."
+                )
+        except BaseException as e:
+            # failed keys are not cached, so they can be loaded again
+            for key in keys:
+                fut = self.futures.pop(key)
+                if fut.done():
+                    continue
+                if isinstance(e, asyncio.CancelledError):
+                    fut.cancel()
+                else:
+                    fut.set_exception(e)
+            if not isinstance(e, Exception):
+                raise
+            return
+        for key, value in zip(keys, values):
+            if not (fut := self.futures[key]).done():
+                fut.set_result(value)
+
+
+__all__ = ["DataLoader", "BatchLoadFn"]
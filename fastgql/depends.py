@@ -2,6 +2,8 @@ import typing as T
 
 
 class Depends:
+    __slots__ = ("dependency",)
+
     def __init__(self, dependency: T.Callable):
         self.dependency = dependency
 
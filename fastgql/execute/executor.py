@@ -1,5 +1,6 @@
 import typing as T
 import time
+from dataclasses import dataclass
 
 import graphql
 from fastapi import Request, Response, BackgroundTasks
@@ -16,11 +17,19 @@ from fastgql.execute.utils import (
     gql_errors_to_graphql_errors,
     RESULT_WRAPPERS,
 )
-from fastgql.execute.resolver import Resolver
+from fastgql.execute.resolver import Resolver, PlanCache
 
 DISPLAY_TO_PYTHON_MAP: dict[str, str] = {}
 
 
+@dataclass
+class CompiledQuery:
+    document: graphql.DocumentNode
+    root_nodes: list[M.OperationNode]
+    # keyed by id(node), so it must live exactly as long as root_nodes
+    plan_cache: PlanCache
+
+
 class Executor:
     """this class has the un-changing config"""
 
@@ -44,9 +53,12 @@ class Executor:
             M.OperationType.query: query_model,
             M.OperationType.mutation: mutation_model,
         }
-        self.root_nodes_cache: dict[str, list[M.OperationNode]] = CacheDict(
+        self.compiled_query_cache: CacheDict = CacheDict(
             cache_len=root_nodes_cache_size
         )
+        # parse and validation errors only depend on the source, so a query that keeps
+        # failing is not parsed and validated again every time
+        self.query_errors_cache: CacheDict = CacheDict(cache_len=root_nodes_cache_size)
         self.process_errors = process_errors
         self.result_wrappers = result_wrappers
 
@@ -69,12 +81,15 @@ class Executor:
         use_cache: bool,
         print_timings: bool = False,
     ) -> Result:
-        start_for_root_nodes = time.time()
-        if use_cache:
-            root_nodes = self.root_nodes_cache.get(source)
-        else:
-            root_nodes = None
-        if not root_nodes:
+        # only read the clock if asked to, timings are in ms
+        timings: dict[str, float] = {}
+        if print_timings:
+            start_for_root_nodes = time.perf_counter_ns()
+        compiled_query = self.compiled_query_cache.get(source) if use_cache else None
+        if not compiled_query and use_cache and validate_query:
+            if query_errors := self.query_errors_cache.get(source):
+                return Result(data=None, errors=query_errors, extensions=None)
+        if not compiled_query:
             if validate_schema:
                 schema_validation_errors = graphql.validate_schema(self.schema)
                 if schema_validation_errors:
@@ -84,32 +99,43 @@ class Executor:
             try:
                 document = graphql.parse(source)
             except graphql.GraphQLError as error:
+                if use_cache and validate_query:
+                    self.query_errors_cache[source] = [error]
                 return Result(data=None, errors=[error], extensions=None)
             if validate_query:
                 validation_errors = graphql.validation.validate(self.schema, document)
                 if validation_errors:
+                    if use_cache:
+                        self.query_errors_cache[source] = validation_errors
                     return Result(data=None, errors=validation_errors, extensions=None)
             if validate_variables:
                 from graphql.execution.execute import assert_valid_execution_arguments
 
                 assert_valid_execution_arguments(self.schema, document, variable_values)
 
-            start_translate = time.time()
+            if print_timings:
+                start_translate = time.perf_counter_ns()
             root_nodes = Translator(
                 document=document,
                 schema=self.schema,
                 display_to_python_map=self.display_to_python_map,
             ).translate()
             if print_timings:
-                print(
-                    f"[TRANSLATING] took {(time.time() - start_translate) * 1_000} ms"
-                )
+                timings["translating"] = (
+                    time.perf_counter_ns() - start_translate
+                ) / 1_000_000
+            compiled_query = CompiledQuery(
+                document=document, root_nodes=root_nodes, plan_cache={}
+            )
             if use_cache:
-                self.root_nodes_cache[source] = root_nodes
+                self.compiled_query_cache[source] = compiled_query
         if print_timings:
-            print(
-                f"[ROOT NODES] parsing took {(time.time() - start_for_root_nodes) * 1_000} ms"
-            )
+            timings["root_nodes"] = (
+                time.perf_counter_ns() - start_for_root_nodes
+            ) / 1_000_000
+            # one line per request, also kept on the request for middleware to report
+            request.state.timings = timings
+            print(f"[TIMINGS] {timings}")
         resolver = Resolver(
             operation_name=operation_name,
             display_to_python_map=self.display_to_python_map,
@@ -120,9 +146,11 @@ class Executor:
             request=request,
             response=response,
             bt=bt,
+            plan_cache=compiled_query.plan_cache,
         )
         d = await resolver.resolve_root_nodes(
-            root_nodes=root_nodes, operation_type_to_model=self.operation_type_to_model
+            root_nodes=compiled_query.root_nodes,
+            operation_type_to_model=self.operation_type_to_model,
         )
         # now process errors
         if self.process_errors:
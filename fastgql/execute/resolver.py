@@ -2,9 +2,17 @@ import typing as T
 import traceback
 import asyncio
 import inspect
+import sys
+import functools
+import dataclasses
+import types
+import uuid
+import enum
+import datetime
+from collections import deque
 
 from fastapi import Request, Response, BackgroundTasks
-from pydantic import TypeAdapter, ValidationError
+from pydantic import TypeAdapter, ValidationError, PlainSerializer, WrapSerializer
 
 from fastgql.gql_ast import models as M
 from fastgql.gql_models import GQL, GQLError
@@ -13,7 +21,212 @@ from fastgql.execute.utils import InfoType, parse_value, Info, ContextType
 from fastgql.utils import node_from_path
 
 
+@functools.cache
+def get_type_adapter(func: T.Callable[..., T.Any], name: str) -> TypeAdapter:
+    return TypeAdapter(inspect.signature(func).parameters[name].annotation)
+
+
+@dataclasses.dataclass(frozen=True)
+class ResolverParam:
+    name: str
+    annotation: T.Any
+    dependency: T.Callable[..., T.Any] | None
+    # "info", "request", "response" or "bt" if the value is injected based on its type
+    injected: str | None
+
+
+@functools.cache
+def get_resolver_params(func: T.Callable[..., T.Any]) -> tuple[ResolverParam, ...]:
+    """the signature of func, flattened once instead of inspected on every call"""
+    params: list[ResolverParam] = []
+    for name, param in inspect.signature(func).parameters.items():
+        annotation = param.annotation
+        injected: str | None = None
+        if inspect.isclass(annotation):
+            if issubclass(annotation, Info):
+                injected = "info"
+            elif issubclass(annotation, Request):
+                injected = "request"
+            elif issubclass(annotation, Response):
+                injected = "response"
+            elif issubclass(annotation, BackgroundTasks):
+                injected = "bt"
+        params.append(
+            ResolverParam(
+                name=name,
+                annotation=annotation,
+                dependency=(
+                    param.default.dependency
+                    if isinstance(param.default, Depends)
+                    else None
+                ),
+                injected=injected,
+            )
+        )
+    return tuple(params)
+
+
+# fields of these types are read as is. The response is written with orjson, which
+# writes UUIDs and dates the same way pydantic's json mode does
+PASSTHROUGH_TYPES = (str, int, bool, types.NoneType, uuid.UUID, datetime.date)
+
+
+def is_passthrough_type(annotation: T.Any) -> bool:
+    if T.get_origin(annotation) in (T.Union, types.UnionType):
+        return all(is_passthrough_type(a) for a in T.get_args(annotation))
+    if isinstance(annotation, type) and issubclass(annotation, enum.Enum):
+        return all(isinstance(member.value, (str, int)) for member in annotation)
+    return annotation in PASSTHROUGH_TYPES
+
+
+@functools.cache
+def get_field_serializers(
+    model_cls: T.Type[GQL],
+) -> dict[str, T.Callable[[T.Any], T.Any] | None] | None:
+    """the json serializer of each field of model_cls, None for fields that need none.
+    Returns None if the model customizes serialization, then model_dump must be used."""
+    decorators = model_cls.__pydantic_decorators__
+    if (
+        decorators.field_serializers
+        or decorators.model_serializers
+        or any(k.startswith("ser_json") for k in model_cls.model_config)
+        or model_cls.model_config.get("json_encoders")
+    ):
+        return None
+    serializers: dict[str, T.Callable[[T.Any], T.Any] | None] = {}
+    for name, field in model_cls.model_fields.items():
+        # field.annotation has the Annotated metadata stripped, serializers live there
+        has_serializer = any(
+            isinstance(m, (PlainSerializer, WrapSerializer)) for m in field.metadata
+        )
+        if not has_serializer and is_passthrough_type(field.annotation):
+            serializers[name] = None
+            continue
+        annotation = field.annotation
+        if field.metadata:
+            annotation = T.Annotated[(annotation, *field.metadata)]
+        # models made with model_construct may hold raw values, e.g. a str for a UUID,
+        # which serialize fine but would warn on every read
+        serializers[name] = functools.partial(
+            TypeAdapter(annotation).dump_python, mode="json", warnings=False
+        )
+    return serializers
+
+
+PlanCache = dict[tuple[T.Type[GQL], int], "ResolvePlan"]
+
+
+@dataclasses.dataclass
+class ResolvePlan:
+    """the children of a node as seen by one GQL model, with inline fragments expanded.
+    Each field entry is (child, name_to_return)."""
+
+    type_name: str
+    # returns the __typename and property values of a model
+    read_leaves: T.Callable[[GQL], dict[str, T.Any]]
+    method_fields: tuple[tuple[M.FieldNode, str], ...]
+    nested_fields: tuple[tuple[M.FieldNode, str], ...]
+    # (name_to_return, display_name) in the order the response returns them
+    output_fields: tuple[tuple[str, str], ...]
+
+
+def compile_read_leaves(
+    model_cls: T.Type[GQL],
+    type_name: str,
+    typename_fields: list[tuple[M.FieldNode, str]],
+    property_fields: list[tuple[M.FieldNode, str]],
+) -> T.Callable[[GQL], dict[str, T.Any]]:
+    """generates a function that reads every leaf of a plan in one straight line,
+    instead of looping over the children for every model resolved"""
+    fields_to_include: dict[str, str] = {}
+    for child, name_to_return in property_fields:
+        fields_to_include[child.name] = name_to_return
+    namespace: dict[str, T.Any] = {
+        "type_name": type_name,
+        "include": set(fields_to_include),
+    }
+    serializers = get_field_serializers(model_cls)
+    items = [f"{name_to_return!r}: type_name" for _, name_to_return in typename_fields]
+    for name, name_to_return in fields_to_include.items():
+        if serializers is None:
+            val = f"model_d[{name!r}]"
+        elif (serializer := serializers[name]) is None:
+            val = f"model.{name}"
+        else:
+            namespace[f"serialize_{name}"] = serializer
+            val = f"serialize_{name}(model.{name})"
+        items.append(f"{name_to_return!r}: {val}")
+        if name_to_return != name:
+            items.append(f"{name!r}: {val}")
+    lines = ["def read_leaves(model):"]
+    if fields_to_include and serializers is None:
+        lines.append("    model_d = model.model_dump(mode='json', include=include)")
+    lines.append(f"    return {{{', '.join(items)}}}")
+    exec("\n".join(lines), namespace)
+    return namespace["read_leaves"]
+
+
+def build_resolve_plan(
+    node: M.FieldNode | M.OperationNode, model_cls: T.Type[GQL]
+) -> ResolvePlan:
+    type_name = model_cls.gql_type_name()
+    typename_fields: list[tuple[M.FieldNode, str]] = []
+    property_fields: list[tuple[M.FieldNode, str]] = []
+    # by name_to_return, a later selection of the same name replaces an earlier one
+    method_fields: dict[str, M.FieldNode] = {}
+    nested_fields: dict[str, M.FieldNode] = {}
+    name_to_return_to_display_name: dict[str, str] = {}
+    children_q = deque(node.children)
+    while children_q:
+        child = children_q.popleft()
+        if isinstance(child, M.InlineFragmentNode):
+            if child.type_condition == type_name:
+                children_q.extendleft(reversed(child.children))
+            continue
+        # interned, since these are the keys of every dict resolve_node returns
+        name_to_return = sys.intern(child.alias or child.display_name)
+        name_to_return_to_display_name[name_to_return] = child.display_name
+        if child.name == "__typename":
+            typename_fields.append((child, name_to_return))
+        elif child.name not in model_cls.model_fields:
+            # this must be a function
+            method_fields[name_to_return] = child
+        elif not child.children:
+            # this is a property
+            property_fields.append((child, name_to_return))
+        else:
+            # this is either a BaseModel or a list of BaseModel
+            nested_fields[name_to_return] = child
+    return ResolvePlan(
+        type_name=type_name,
+        read_leaves=compile_read_leaves(
+            model_cls=model_cls,
+            type_name=type_name,
+            typename_fields=typename_fields,
+            property_fields=property_fields,
+        ),
+        method_fields=tuple((c, n) for n, c in method_fields.items()),
+        nested_fields=tuple((c, n) for n, c in nested_fields.items()),
+        output_fields=tuple(name_to_return_to_display_name.items()),
+    )
+
+
 class Resolver:
+    __slots__ = (
+        "operation_name",
+        "display_to_python_map",
+        "validation_context",
+        "info_cls",
+        "is_not_nullable_map",
+        "variables",
+        "request",
+        "response",
+        "bt",
+        "errors",
+        "plan_cache",
+        "context",
+    )
+
     def __init__(
         self,
         *,
@@ -26,9 +239,12 @@ class Resolver:
         request: Request,
         response: Response,
         bt: BackgroundTasks,
+        plan_cache: PlanCache | None = None,
     ):
         self.operation_name = operation_name
         self.display_to_python_map = display_to_python_map
+        # lets GQLInput map display names back to python names when validating
+        self.validation_context = {"_display_to_python_map": display_to_python_map}
         self.info_cls = info_cls
         self.is_not_nullable_map = is_not_nullable_map
         self.variables = variables
@@ -38,6 +254,8 @@ class Resolver:
         self.bt = bt
 
         self.errors: list[GQLError] = []
+        # keyed by id(node), so it must not outlive the nodes it was built from
+        self.plan_cache: PlanCache = plan_cache if plan_cache is not None else {}
 
         self.context: ContextType = context_cls(
             request=self.request,
@@ -61,53 +279,47 @@ class Resolver:
         self, func: T.Callable[..., T.Any], kwargs: dict[str, T.Any], info: InfoType
     ) -> dict[str, T.Any]:
         new_kwargs: dict[str, T.Any] = {}
-        sig = inspect.signature(func)
-        for name, param in sig.parameters.items():
+        # bound methods are not hashable (their model is not), so cache on the function
+        unbound_func = getattr(func, "__func__", func)
+        for param in get_resolver_params(unbound_func):
+            name = param.name
             if name in kwargs:
                 val = kwargs[name]
                 if val is not None:
+                    type_adapter = get_type_adapter(unbound_func, name)
                     try:
-                        val = TypeAdapter(param.annotation).validate_python(
-                            val,
-                            context={
-                                "_display_to_python_map": self.display_to_python_map
-                            },
+                        val = type_adapter.validate_python(
+                            val, context=self.validation_context
                         )
                     except ValidationError as e:
                         if e.errors()[0]["type"] == "list_type" and not isinstance(
                             val, list
                         ):
-                            val = TypeAdapter(param.annotation).validate_python(
-                                [val],
-                                context={
-                                    "_display_to_python_map": self.display_to_python_map
-                                },
+                            val = type_adapter.validate_python(
+                                [val], context=self.validation_context
                             )
                         else:
                             raise e
                 new_kwargs[name] = val
-            else:
-                if isinstance(param.default, Depends):
-                    new_kwargs[name] = await self.inject_dependencies(
-                        func=param.default.dependency, kwargs=kwargs, info=info
-                    )
-                elif inspect.isclass(param.annotation):
-                    if issubclass(param.annotation, Info):
-                        new_kwargs[name] = info
-                    elif issubclass(param.annotation, Request):
-                        new_kwargs[name] = self.request
-                    elif issubclass(param.annotation, Response):
-                        new_kwargs[name] = self.response
-                    elif issubclass(param.annotation, BackgroundTasks):
-                        new_kwargs[name] = self.bt
-                # just continue, the value is not given and that is okay
+            elif param.dependency:
+                new_kwargs[name] = await self.inject_dependencies(
+                    func=param.dependency, kwargs=kwargs, info=info
+                )
+            elif param.injected == "info":
+                new_kwargs[name] = info
+            elif param.injected == "request":
+                new_kwargs[name] = self.request
+            elif param.injected == "response":
+                new_kwargs[name] = self.response
+            elif param.injected == "bt":
+                new_kwargs[name] = self.bt
+            # just continue, the value is not given and that is okay
         return new_kwargs
 
     def get_info_key(self, func: T.Callable[..., T.Any]) -> str | None:
-        sig = inspect.signature(func)
-        for name, param in sig.parameters.items():
+        for param in get_resolver_params(getattr(func, "__func__", func)):
             if param.annotation == self.info_cls:
-                return name
+                return param.name
 
     async def inject_dependencies_and_execute(
         self,
@@ -144,6 +356,11 @@ class Resolver:
         path: tuple[str, ...],
     ) -> dict[str, T.Any] | None | list[dict[str, T.Any] | None]:
         if isinstance(model_s, list):
+            # gathering wraps every coroutine in a task, not worth it for one model
+            if len(model_s) == 0:
+                return []
+            if len(model_s) == 1:
+                return [await self.resolve_node(node=node, model=model_s[0], path=path)]
             return list(
                 await asyncio.gather(
                     *[
@@ -166,56 +383,53 @@ class Resolver:
             raise Exception(
                 f"Model {model.__class__.__name__} must be an instance of GQL."
             )
-        # return final dict, or array of dicts, for the node
-        final_d: dict[str, T.Any] = {}
-        fields_to_include: dict[str, str] = {}
-        name_to_return_to_display_name: dict[str, str] = {}
-        children_q = [*node.children]
-        proms_map: dict[str, T.Awaitable] = {}
-        while len(children_q) > 0:
-            child = children_q.pop(0)
-            if isinstance(child, M.InlineFragmentNode):
-                if child.type_condition == model.gql_type_name():
-                    children_q[:0] = child.children
+        plan_key = (type(model), id(node))
+        plan = self.plan_cache.get(plan_key)
+        if plan is None:
+            plan = build_resolve_plan(node=node, model_cls=type(model))
+            self.plan_cache[plan_key] = plan
+        overwrite_map = self.context.overwrite_return_value_map
+        # return final dict, or array of dicts, for the node.
+        # leaves are never in the overwrite map, only nodes with children are
+        final_d: dict[str, T.Any] = plan.read_leaves(model)
+        # names of the fields that are awaited, in the order of proms
+        prom_names: list[str] = []
+        proms: list[T.Awaitable] = []
+        for child, name_to_return in plan.method_fields:
+            if child in overwrite_map:
+                final_d[name_to_return] = overwrite_map[child]
                 continue
-            name_to_return = child.alias or child.display_name
-            name_to_return_to_display_name[name_to_return] = child.display_name
-            if child in self.context.overwrite_return_value_map:
-                final_d[name_to_return] = self.context.overwrite_return_value_map[child]
+            kwargs = {
+                arg.name: parse_value(variables=self.variables, v=arg.value)
+                for arg in child.arguments
+            }
+            prom_names.append(name_to_return)
+            proms.append(
+                self.inject_dependencies_and_execute(
+                    method=getattr(model, child.name),
+                    node=child,
+                    parent=node,
+                    kwargs=kwargs,
+                    new_path=(*path, name_to_return),
+                )
+            )
+        for child, name_to_return in plan.nested_fields:
+            if child in overwrite_map:
+                final_d[name_to_return] = overwrite_map[child]
                 continue
-            new_path = (*path, name_to_return)
-            if child.name == "__typename":
-                final_d[name_to_return] = model.gql_type_name()
-            else:
-                if child.name not in model.model_fields:
-                    # this must be a function
-                    kwargs = {
-                        arg.name: parse_value(variables=self.variables, v=arg.value)
-                        for arg in child.arguments
-                    }
-                    proms_map[name_to_return] = self.inject_dependencies_and_execute(
-                        method=getattr(model, child.name),
-                        node=child,
-                        parent=node,
-                        kwargs=kwargs,
-                        new_path=new_path,
-                    )
-                else:
-                    if not child.children:
-                        # this is a property
-                        fields_to_include[child.name] = name_to_return
-                    else:
-                        # this is either a BaseModel or a list of BaseModel
-                        proms_map[name_to_return] = self.resolve_node_s(
-                            node=child,
-                            path=new_path,
-                            model_s=getattr(model, child.name),
-                        )
+            prom_names.append(name_to_return)
+            proms.append(
+                self.resolve_node_s(
+                    node=child,
+                    path=(*path, name_to_return),
+                    model_s=getattr(model, child.name),
+                )
+            )
 
         # now gather the await-ables
-        if proms_map:
-            vals = await asyncio.gather(*proms_map.values(), return_exceptions=True)
-            for name, val in zip(proms_map.keys(), vals):
+        if proms:
+            vals = await asyncio.gather(*proms, return_exceptions=True)
+            for name, val in zip(prom_names, vals):
                 if isinstance(val, Exception):
                     if isinstance(val, GQLError):
                         self.errors.append(val)
@@ -238,20 +452,15 @@ class Resolver:
                         traceback.print_exception(val)
                     val = None
                 final_d[name] = val
-        model_d = model.model_dump(mode="json", include=set(fields_to_include))
-        for name, name_to_use in fields_to_include.items():
-            final_d[name_to_use] = model_d[name]
-            if name_to_use != name:
-                final_d[name] = model_d[name]
 
         # now null check and order property
         sorted_d = {}
-        for name_to_return, name in name_to_return_to_display_name.items():
+        for name_to_return, name in plan.output_fields:
             val = final_d[name_to_return]
             if (
                 val is None or isinstance(val, list) and None in val
             ):  # TODO speed test, must go thru every list?
-                if self.is_not_nullable_map[model.gql_type_name()][name]:
+                if self.is_not_nullable_map[plan.type_name][name]:
                     # get the actual node from the path
                     null_node = node_from_path(
                         node=node, path=[name_to_return], use_field_to_use=True
@@ -1,10 +1,12 @@
 import typing as T
+import functools
+import weakref
 from fastapi import Request, Response
-from collections import OrderedDict
 from dataclasses import dataclass
 
 from pydantic import create_model
 import graphql
+import orjson
 
 from fastgql.info import Info, ContextType
 from fastgql.gql_models import GQL, GQLError
@@ -23,11 +25,18 @@ class GraphQLRequestData:
 
 @dataclass
 class Result:
+    # uuid, date and enum leaves are left as python values for the orjson response,
+    # use to_json_mode before handing data to json.dumps
     data: T.Any | None
     errors: list[graphql.GraphQLError] | None
     extensions: list[T.Any] | None
 
 
+def to_json_mode(data: T.Any) -> T.Any:
+    """data with every leaf as the json value the response has for it"""
+    return orjson.loads(orjson.dumps(data))
+
+
 RESULT_WRAPPERS = T.Optional[
     T.List[
         T.Callable[
@@ -41,49 +50,80 @@ RESULT_WRAPPERS = T.Optional[
 def gql_errors_to_graphql_errors(
     gql_errors: list[GQLError],
 ) -> list[graphql.GraphQLError]:
-    graphql_errors: list[graphql.GraphQLError] = []
-    for e in gql_errors:
-        graphql_errors.append(
-            graphql.GraphQLError(
-                message=e.message,
-                nodes=e.node.original_node if e.node else None,
-                path=e.path,
-                original_error=e.original_error,
-                extensions=e.extensions,
-            )
+    if not gql_errors:
+        return []
+    graphql_error_cls = graphql.GraphQLError
+    return [
+        graphql_error_cls(
+            message=e.message,
+            nodes=e.node.original_node if e.node else None,
+            path=e.path,
+            original_error=e.original_error,
+            extensions=e.extensions,
         )
-    return graphql_errors
+        for e in gql_errors
+    ]
 
 
-class CacheDict(OrderedDict):
-    """Dict with a limited length, ejecting LRUs as needed."""
+class CacheDict:
+    """Dict with a limited length, ejecting LRUs as needed.
+    Backed by a plain dict, which keeps insertion order, so the oldest key is first."""
 
     def __init__(self, *args, cache_len: int, **kwargs):
         assert cache_len > 0
         self.cache_len = cache_len
 
-        super().__init__(*args, **kwargs)
+        self._d: dict[T.Any, T.Any] = {}
+        for key, value in dict(*args, **kwargs).items():
+            self[key] = value
 
     def __setitem__(self, key, value):
-        super().__setitem__(key, value)
-        super().move_to_end(key)
+        d = self._d
+        if key in d:
+            del d[key]
+        d[key] = value
 
-        while len(self) > self.cache_len:
-            oldkey = next(iter(self))
-            super().__delitem__(oldkey)
+        while len(d) > self.cache_len:
+            del d[next(iter(d))]
 
     def __getitem__(self, key):
-        val = super().__getitem__(key)
-        super().move_to_end(key)
+        # re-inserting moves the key to the end
+        val = self._d.pop(key)
+        self._d[key] = val
 
         return val
 
+    def get(self, key, default=None):
+        if key in self._d:
+            return self[key]
+        return default
+
+    def __delitem__(self, key):
+        del self._d[key]
+
+    def __contains__(self, key) -> bool:
+        return key in self._d
+
+    def __len__(self) -> int:
+        return len(self._d)
 
+    def __iter__(self):
+        return iter(self._d)
+
+
+# names on GQL itself are never copied onto combined models
+EXCLUDED_METHODS = frozenset(dir(GQL))
+GQL_MRO = frozenset(GQL.__mro__)
+
+
+@functools.cache
 def combine_models(name: str, *models: T.Type[GQL]) -> T.Type[GQL]:
+    """combines models into one, built once per name and models"""
     combined_model = create_model(name, __base__=GQL)
+    combined_names = frozenset(dir(combined_model))
 
     seen_fields = set()
-    excluded_methods = set(dir(GQL))
+    seen_methods = set()
 
     for model in models:
         for field_name, field_value in model.model_fields.items():
@@ -92,52 +132,99 @@ def combine_models(name: str, *models: T.Type[GQL]) -> T.Type[GQL]:
             setattr(combined_model, field_name, field_value)
             seen_fields.add(field_name)
 
-        for method_name in dir(model):
-            if (
-                not method_name.startswith("_")
-                and callable(getattr(model, method_name))
-                and method_name not in excluded_methods
-            ):
+        # only the classes between model and GQL can define resolvers
+        model_methods: set[str] = set()
+        for klass in model.__mro__:
+            if klass in GQL_MRO:
+                continue
+            for method_name, attr in klass.__dict__.items():
+                if (
+                    method_name.startswith("_")
+                    or method_name in EXCLUDED_METHODS
+                    or method_name in model_methods
+                ):
+                    continue
+                # subclasses come first in the mro, so they shadow their bases
+                model_methods.add(method_name)
                 method = getattr(model, method_name)
-                if isinstance(model.__dict__.get(method_name), staticmethod):
+                if not callable(method):
+                    continue
+                if isinstance(attr, staticmethod):
                     method = staticmethod(method)
-                elif isinstance(model.__dict__.get(method_name), classmethod):
+                elif isinstance(attr, classmethod):
                     method = classmethod(method)
-                if method_name in dir(combined_model):
+                if (
+                    method_name in seen_methods
+                    or method_name in seen_fields
+                    or method_name in combined_names
+                ):
                     raise ValueError(f"Conflicting method: {method_name}")
                 setattr(combined_model, method_name, method)
+                seen_methods.add(method_name)
 
     combined_model.model_rebuild()
     return combined_model
 
 
+# the values parse_value walks are built by the Translator, so they are always exactly
+# these classes and can be dispatched on with a set lookup instead of isinstance
+VariableNode = graphql.VariableNode
+PARSED_CONTAINER_TYPES = frozenset((dict, list, VariableNode))
+
+
 def parse_value(variables: dict[str, T.Any] | None, v: T.Any) -> T.Any:
-    if isinstance(v, dict):
-        return {
-            k: parse_value(variables=variables, v=inner_v) for k, inner_v in v.items()
-        }
-    if isinstance(v, list):
-        return [parse_value(variables=variables, v=inner_v) for inner_v in v]
-    if isinstance(v, graphql.VariableNode):
-        if v.name.value not in variables:
-            raise Exception(f"Variable {v.name.value} was not given.")
-        return variables[v.name.value]
-    return v
+    """copies v with its variables filled in. Walks with a stack instead of recursing"""
+    container_types = PARSED_CONTAINER_TYPES
+    if type(v) not in container_types:
+        return v
+    root: list[T.Any] = [None]
+    # (container to write to, key or index in it, value to parse)
+    stack: list[tuple[T.Any, T.Any, T.Any]] = [(root, 0, v)]
+    while stack:
+        parent, key, val = stack.pop()
+        val_t = type(val)
+        if val_t is VariableNode:
+            try:
+                parent[key] = variables[val.name.value]
+            except (KeyError, TypeError):
+                raise Exception(f"Variable {val.name.value} was not given.") from None
+        elif val_t is dict:
+            out_d = {}
+            parent[key] = out_d
+            for k, inner_v in val.items():
+                # keep the key order, the placeholder is filled in when popped
+                out_d[k] = inner_v
+                if type(inner_v) in container_types:
+                    stack.append((out_d, k, inner_v))
+        else:
+            out_l = [*val]
+            parent[key] = out_l
+            for i, inner_v in enumerate(val):
+                if type(inner_v) in container_types:
+                    stack.append((out_l, i, inner_v))
+    return root[0]
+
+
+# built once per schema, dropped with it
+IS_NOT_NULLABLE_MAPS: weakref.WeakKeyDictionary[
+    graphql.GraphQLSchema, dict[str, dict[str, bool]]
+] = weakref.WeakKeyDictionary()
 
 
 def build_is_not_nullable_map(
     schema: graphql.GraphQLSchema,
 ) -> dict[str, dict[str, bool]]:
+    if (cached := IS_NOT_NULLABLE_MAPS.get(schema)) is not None:
+        return cached
+    non_null_t = graphql.GraphQLNonNull
     is_not_nullable_map: dict[str, dict[str, bool]] = {}
     for type_name, gql_type in schema.type_map.items():
         if isinstance(gql_type, graphql.GraphQLObjectType):
-            is_not_nullable_map[type_name] = {}
-            type_map = is_not_nullable_map[type_name]
-            for field_name, field_val in gql_type.fields.items():
-                field_val: graphql.GraphQLField
-                type_map[field_name] = isinstance(
-                    field_val.type, graphql.GraphQLNonNull
-                )
+            is_not_nullable_map[type_name] = {
+                field_name: type(field_val.type) is non_null_t
+                for field_name, field_val in gql_type.fields.items()
+            }
+    IS_NOT_NULLABLE_MAPS[schema] = is_not_nullable_map
     return is_not_nullable_map
 
 
@@ -168,4 +255,5 @@ __all__ = [
     "Info",
     "GraphQLRequestData",
     "RESULT_WRAPPERS",
+    "to_json_mode",
 ]
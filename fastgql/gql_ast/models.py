@@ -1,5 +1,4 @@
 import typing as T
-import uuid
 from dataclasses import dataclass, field
 from enum import Enum
 import graphql
@@ -12,24 +11,22 @@ class OperationType(str, Enum):
     mutation = "mutation"
 
 
-@dataclass
-class Argument:
+class Argument(T.NamedTuple):
     name: str
     display_name: str
     value: T.Any | None
 
 
-@dataclass(frozen=True)
+# nodes are compared and hashed by identity, like plain objects.
+# They are cached with the query they were translated from and shared by every
+# request running it, so they must never be mutated or recycled for another query
+@dataclass(frozen=True, eq=False, slots=True)
 class Node:
-    id: uuid.UUID
     original_node: graphql.Node
     children: list[T.Union["FieldNode", "InlineFragmentNode"]] | None
 
-    def __hash__(self):
-        return hash(self.id)
 
-
-@dataclass(frozen=True)
+@dataclass(frozen=True, eq=False, slots=True)
 class FieldNode(Node):
     name: str
     alias: str | None
@@ -37,51 +34,34 @@ class FieldNode(Node):
     arguments: list[Argument]
     annotation: T.Any
 
-    def __hash__(self):
-        return hash(self.id)
-
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, eq=False, slots=True)
 class FieldNodeField(FieldNode):
     field: FieldInfo
 
-    def __hash__(self):
-        return hash(self.id)
 
-
-@dataclass(frozen=True)
+@dataclass(frozen=True, eq=False, slots=True)
 class FieldNodeMethod(FieldNode):
     method: T.Callable
 
-    def __hash__(self):
-        return hash(self.id)
-
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, eq=False, slots=True)
 class FieldNodeModel(FieldNode):
-    models: list[T.Type[BaseModel]]
+    # by graphql type name, one entry unless this is a union. This used to be a list
+    models: dict[str, T.Type[BaseModel]]
 
-    def __hash__(self):
-        return hash(self.id)
 
-
-@dataclass(frozen=True)
+@dataclass(frozen=True, eq=False, slots=True)
 class InlineFragmentNode(Node):
     type_condition: str
     annotation: T.Any
 
-    def __hash__(self):
-        return hash(self.id)
-
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, eq=False, slots=True)
 class OperationNode(Node):
     name: str | None
     type: OperationType
 
-    def __hash__(self):
-        return hash(self.id)
-
 
 __all__ = [
     "OperationType",
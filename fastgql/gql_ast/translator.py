@@ -1,7 +1,11 @@
 import typing as T
-import uuid
+import sys
+import weakref
+from collections import deque
+
 import graphql
 from graphql.type.definition import GraphQLNullableType
+from pydantic import BaseModel
 from .models import (
     FieldNode,
     FieldNodeModel,
@@ -13,6 +17,28 @@ from .models import (
     Argument,
 )
 
+# the models of a schema type by graphql type name, built once and dropped with the type
+MODELS_BY_TYPE_NAME: weakref.WeakKeyDictionary[
+    graphql.GraphQLObjectType | graphql.GraphQLUnionType, dict[str, T.Type[BaseModel]]
+] = weakref.WeakKeyDictionary()
+
+OPERATION_TYPES: dict[graphql.OperationType, OperationType] = {
+    graphql.OperationType.QUERY: OperationType.query,
+    graphql.OperationType.MUTATION: OperationType.mutation,
+}
+
+
+def parse_object_val(
+    translator: "Translator", val: graphql.ObjectValueNode
+) -> dict[str, T.Any]:
+    parse_val = translator.parse_val
+    return {field.name.value: parse_val(field.value) for field in val.fields}
+
+
+def parse_list_val(translator: "Translator", val: graphql.ListValueNode) -> list[T.Any]:
+    parse_val = translator.parse_val
+    return [parse_val(v) for v in val.values]
+
 
 class Translator:
     def __init__(
@@ -28,27 +54,27 @@ class Translator:
         self.mutation_definitions: list[graphql.OperationDefinitionNode] = []
         self.subscription_definitions: list[graphql.OperationDefinitionNode] = []
         self.fragment_definitions: dict[str, graphql.FragmentDefinitionNode] = {}
+        # schema types live as long as the schema, so their ids are stable keys
+        self.root_type_cache: dict[tuple[int, str | None], T.Any] = {}
+
+    # keyed on the exact node class, anything else (enums) is parsed as its .value
+    # TODO for enums, lists... might need to use pydantic validate call here...anoying w return types and all
+    VALUE_PARSERS: dict[
+        type[graphql.ValueNode], T.Callable[["Translator", T.Any], T.Any]
+    ] = {
+        graphql.VariableNode: lambda self, val: val,
+        graphql.IntValueNode: lambda self, val: int(val.value),
+        graphql.FloatValueNode: lambda self, val: float(val.value),
+        graphql.StringValueNode: lambda self, val: val.value,
+        graphql.BooleanValueNode: lambda self, val: bool(val.value),
+        graphql.ObjectValueNode: parse_object_val,
+        graphql.ListValueNode: parse_list_val,
+        graphql.NullValueNode: lambda self, val: None,
+    }
 
     def parse_val(self, val: graphql.ValueNode) -> T.Any:
-        if isinstance(val, graphql.VariableNode):
-            return val
-        if isinstance(val, graphql.IntValueNode):
-            return int(val.value)
-        if isinstance(val, graphql.FloatValueNode):
-            return float(val.value)
-        if isinstance(val, graphql.StringValueNode):
-            return val.value
-        if isinstance(val, graphql.BooleanValueNode):
-            return bool(val.value)
-        if isinstance(val, graphql.ObjectValueNode):
-            return {
-                field.name.value: self.parse_val(field.value) for field in val.fields
-            }
-        if isinstance(val, graphql.ListValueNode):
-            return [self.parse_val(v) for v in val.values]
-        if isinstance(val, graphql.NullValueNode):
-            return None
-        # TODO for enums, lists... might need to use pydantic validate call here...anoying w return types and all
+        if parser := self.VALUE_PARSERS.get(type(val)):
+            return parser(self, val)
         return val.value
 
     @staticmethod
@@ -77,19 +103,23 @@ class Translator:
             return None
         children: list[FieldNode | InlineFragmentNode] = []
         root_field = self.get_root_type(type_=gql_field)
-        selection_q = [*node.selection_set.selections]
+        selection_q = deque(node.selection_set.selections)
+        fragment_spread_node_t = graphql.FragmentSpreadNode
+        field_node_t = graphql.FieldNode
+        inline_fragment_node_t = graphql.InlineFragmentNode
 
         # first, flatten and combine them
         has_seen: dict[str, graphql.InlineFragmentNode | graphql.FieldNode] = {}
-        while len(selection_q) > 0:
-            sel = selection_q.pop(0)
-            if isinstance(sel, graphql.FragmentSpreadNode):
+        while selection_q:
+            sel = selection_q.popleft()
+            sel_t = type(sel)
+            if sel_t is fragment_spread_node_t:
                 frag = self.fragment_definitions[sel.name.value]
                 selection_q.extend(frag.selection_set.selections)
                 continue
-            if isinstance(sel, graphql.FieldNode):
+            if sel_t is field_node_t:
                 key = sel.alias.value if sel.alias else sel.name.value
-            elif isinstance(sel, graphql.InlineFragmentNode):
+            elif sel_t is inline_fragment_node_t:
                 key = sel.type_condition.name
             else:
                 raise Exception(f"Invalid sel: {sel=}")
@@ -114,7 +144,6 @@ class Translator:
             children.extend(child_s if isinstance(child_s, list) else [child_s])
         return children
 
-    # @cache #TODO cache but these models are not hashable...
     def get_root_type(
         self,
         type_: T.Union[
@@ -125,19 +154,41 @@ class Translator:
         ],
         type_condition: str = None,
     ) -> graphql.GraphQLObjectType | tuple[graphql.GraphQLUnionType] | None:
-        if hasattr(type_, "of_type"):
-            return self.get_root_type(type_.of_type, type_condition=type_condition)
-        if hasattr(type_, "type"):
-            return self.get_root_type(type_.type, type_condition=type_condition)
-        if type_condition:
-            if hasattr(type_, "types"):
-                types = [self.get_root_type(t) for t in type_.types]
-                for t in types:
-                    if t.name == type_condition:
-                        return t
+        key = (id(type_), type_condition)
+        if key in self.root_type_cache:
+            return self.root_type_cache[key]
+        root_type = type_
+        while True:
+            if hasattr(root_type, "of_type"):
+                root_type = root_type.of_type
+            elif hasattr(root_type, "type"):
+                root_type = root_type.type
+            else:
+                break
+        if type_condition and hasattr(root_type, "types"):
+            for t in root_type.types:
+                t = self.get_root_type(t)
+                if t.name == type_condition:
+                    root_type = t
+                    break
+            else:
                 raise Exception("Type condition was not found.")
+        self.root_type_cache[key] = root_type
+        return root_type
 
-        return type_
+    @staticmethod
+    def get_models_by_type_name(
+        root_type: graphql.GraphQLObjectType | graphql.GraphQLUnionType,
+    ) -> dict[str, T.Type[BaseModel]]:
+        """built once per schema type and shared by every node of that type"""
+        if (models := MODELS_BY_TYPE_NAME.get(root_type)) is None:
+            if isinstance(root_type, graphql.GraphQLUnionType):
+                types = root_type.types
+            else:
+                types = (root_type,)
+            models = {t.name: t._pydantic_model for t in types}
+            MODELS_BY_TYPE_NAME[root_type] = models
+        return models
 
     def from_node(
         self,
@@ -146,7 +197,9 @@ class Translator:
         path: tuple[str, ...],
     ) -> FieldNode | InlineFragmentNode | list[FieldNode | InlineFragmentNode]:
         """if this is a fragment, return many nodes"""
-        if isinstance(node, graphql.FragmentSpreadNode):
+        # selection nodes are never subclassed, so dispatch on the exact class
+        node_t = type(node)
+        if node_t is graphql.FragmentSpreadNode:
             frag = self.fragment_definitions[node.name.value]
             return [
                 self.from_node(
@@ -164,10 +217,9 @@ class Translator:
         else:
             annotation = gql_field.type._anno
 
-        if isinstance(node, graphql.InlineFragmentNode):
-            type_condition = node.type_condition.name.value
+        if node_t is graphql.InlineFragmentNode:
+            type_condition = sys.intern(node.type_condition.name.value)
             return InlineFragmentNode(
-                id=uuid.uuid4(),
                 children=self.children_from_node(
                     gql_field=gql_field,
                     node=node,
@@ -177,37 +229,38 @@ class Translator:
                 type_condition=type_condition,
                 annotation=annotation,
             )
-        elif isinstance(node, graphql.FieldNode):
+        elif node_t is graphql.FieldNode:
             # build args
             arguments: list[Argument] = []
             for argument in node.arguments:
                 arguments.append(
                     Argument(
-                        display_name=argument.name.value,
+                        display_name=sys.intern(argument.name.value),
                         name=self.display_to_python_map[argument.name.value],
                         value=self.parse_val(argument.value),
                     )
                 )
-            alias = node.alias.value if node.alias else None
+            # names parsed from the query are new strings on every parse, interning
+            # them dedupes them and makes dict lookups on them compare by pointer
+            alias = sys.intern(node.alias.value) if node.alias else None
+            display_name = sys.intern(node.name.value)
             try:
-                name = self.display_to_python_map[node.name.value]
+                name = self.display_to_python_map[display_name]
             except KeyError as e:
-                if node.name.value == "__typename":
-                    name = node.name.value
+                if display_name == "__typename":
+                    name = display_name
                 else:
                     raise e
 
             children = self.children_from_node(
                 gql_field=gql_field,
                 node=node,
-                path_to_children=(*path, node.name.value),
+                path_to_children=(*path, display_name),
             )
-            display_name = node.name.value
             # gql_field_type = self.get_root_type(gql_field)
             if not gql_field:
                 # this is __typename
                 return FieldNode(
-                    id=uuid.uuid4(),
                     original_node=node,
                     children=children,
                     name=name,
@@ -217,9 +270,8 @@ class Translator:
                     annotation=annotation,
                 )
             gql_field_type = gql_field.type
-            if hasattr(gql_field_type, "_field_info"):
+            if (field_info := getattr(gql_field_type, "_field_info", None)) is not None:
                 return FieldNodeField(
-                    id=uuid.uuid4(),
                     original_node=node,
                     children=children,
                     name=name,
@@ -227,11 +279,10 @@ class Translator:
                     display_name=display_name,
                     arguments=arguments,
                     annotation=annotation,
-                    field=gql_field_type._field_info,
+                    field=field_info,
                 )
-            elif hasattr(gql_field_type, "_method"):
+            elif (method := getattr(gql_field_type, "_method", None)) is not None:
                 return FieldNodeMethod(
-                    id=uuid.uuid4(),
                     original_node=node,
                     children=children,
                     name=name,
@@ -239,14 +290,14 @@ class Translator:
                     display_name=display_name,
                     arguments=arguments,
                     annotation=annotation,
-                    method=gql_field_type._method,
+                    method=method,
                 )
             else:
                 root_type = self.get_root_type(gql_field)
-                if isinstance(root_type, graphql.GraphQLUnionType):
-                    models = [t._pydantic_model for t in root_type.types]
-                elif hasattr(root_type, "_pydantic_model"):
-                    models = [root_type._pydantic_model]
+                if isinstance(root_type, graphql.GraphQLUnionType) or hasattr(
+                    root_type, "_pydantic_model"
+                ):
+                    models = self.get_models_by_type_name(root_type)
                 else:
                     # hacky fix because the enum wasn't being registered
                     if isinstance(root_type, graphql.GraphQLEnumType):
@@ -255,7 +306,6 @@ class Translator:
                             # TODO not sure if this is okay
                             if not hasattr(gql_field_temp, "of_type"):
                                 return FieldNodeField(
-                                    id=uuid.uuid4(),
                                     original_node=node,
                                     children=children,
                                     name=name,
@@ -267,7 +317,6 @@ class Translator:
                                 )
                             gql_field_temp = getattr(gql_field_temp, "of_type")
                         return FieldNodeField(
-                            id=uuid.uuid4(),
                             original_node=node,
                             children=children,
                             name=name,
@@ -279,7 +328,6 @@ class Translator:
                         )
                 # otherwise, this will be an object type
                 return FieldNodeModel(
-                    id=uuid.uuid4(),
                     original_node=node,
                     children=children,
                     name=name,
@@ -297,18 +345,21 @@ class Translator:
     ) -> OperationNode:
         # first, build children, and then their children
         children: list[FieldNode | InlineFragmentNode] = []
+        op = node.operation
+        if op is graphql.OperationType.QUERY:
+            root_fields = self.schema.query_type.fields
+        elif op is graphql.OperationType.MUTATION:
+            root_fields = self.schema.mutation_type.fields
+        else:
+            raise Exception(f"Unimplemented operation type: {node.operation=}")
+        operation_type = OPERATION_TYPES[op]
+        path = (operation_type.value,)
         # TODO possible inline frags?
         for sel in node.selection_set.selections:
-            if node.operation == graphql.OperationType.MUTATION:
-                gql_field = self.schema.mutation_type
-            elif node.operation == graphql.OperationType.QUERY:
-                gql_field = self.schema.query_type
-            else:
-                raise Exception(f"Unimplemented operation type: {node.operation=}")
             child_s = self.from_node(
-                gql_field=gql_field.fields[sel.name.value],
+                gql_field=root_fields[sel.name.value],
                 node=sel,
-                path=(node.operation.value,),
+                path=path,
             )
             if type(child_s) is list:
                 children.extend(child_s)
@@ -316,9 +367,8 @@ class Translator:
                 children.append(child_s)
 
         op = OperationNode(
-            id=uuid.uuid4(),
             name=node.name.value if node.name else None,
-            type=OperationType(node.operation.value),
+            type=operation_type,
             children=children,
             original_node=node,
         )
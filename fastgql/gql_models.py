@@ -16,7 +16,11 @@ class GQL(BaseModel):
 
     @classmethod
     def gql_type_name(cls) -> str:
-        return cls.gql_config.get("type_name", cls.__name__)
+        # cached in the class' own __dict__ so subclasses do not inherit it
+        if (name := cls.__dict__.get("_gql_type_name")) is None:
+            name = cls.gql_config.get("type_name", cls.__name__)
+            cls._gql_type_name = name
+        return name
 
     @classmethod
     def gql_description(cls) -> str | None:
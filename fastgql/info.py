@@ -6,7 +6,7 @@ from fastgql.context import BaseContext
 ContextType = T.TypeVar("ContextType", bound=BaseContext)
 
 
-@dataclasses.dataclass
+@dataclasses.dataclass(slots=True)
 class Info(T.Generic[ContextType]):
     """needed to make this a raw dataclass because context needs to be kept as a reference... pydantic copies dicts"""
 
@@ -1,11 +1,11 @@
 import typing as T
-import inspect
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 
 from fastgql.info import Info
 from fastgql.gql_ast import models as M
 from fastgql.execute.utils import parse_value
-from fastgql.utils import node_from_path
+from fastgql.utils import node_from_path, iter_field_nodes
+from fastgql.query_builders.utils import call_update_qb
 from .query_builder import QueryBuilder, ChildEdge
 
 
@@ -32,6 +32,19 @@ def combine_qbs(
     return new_qb
 
 
+# what from_info can pass to update_qb(s) besides the field's arguments
+UPDATE_QB_SLOTS = frozenset(("qb", "child_qb", "node", "child_node", "info"))
+
+
+def parse_arg(
+    fn: T.Callable[..., T.Any],
+    name: str,
+    value: T.Any,
+    variables: dict[str, T.Any] | None,
+) -> T.Any:
+    return parse_value(variables=variables, v=value)
+
+
 @dataclass
 class Property:
     db_name: str | None
@@ -48,113 +61,118 @@ class Link:
     update_qbs: T.Callable[[..., T.Any], None | T.Awaitable] = None
 
 
+# the property, its prebuilt field expression and the link for one field name
+ChildConfigs = tuple[Property | None, str | None, Link | None]
+
+
 @dataclass
 class QueryBuilderConfig:
     properties: dict[str, Property]
     links: dict[str, Link]
+    # cache over properties and links, so they (and each property's db_name) must not
+    # change once the config has been used in a query
+    configs_by_name: dict[str, ChildConfigs] | None = field(
+        default=None, init=False, repr=False, compare=False
+    )
 
     def is_empty(self) -> bool:
         return not self.properties and not self.links
 
+    def get_configs_by_name(self) -> dict[str, ChildConfigs]:
+        """built on first use, after build_from_schema has filled properties and links"""
+        if self.configs_by_name is None:
+            configs_by_name: dict[str, ChildConfigs] = {}
+            for name in self.properties.keys() | self.links.keys():
+                property_config = self.properties.get(name)
+                field_expr: str | None = None
+                if property_config and (db_name := property_config.db_name):
+                    field_expr = db_name if name == db_name else f"{name} := .{db_name}"
+                configs_by_name[name] = (
+                    property_config,
+                    field_expr,
+                    self.links.get(name),
+                )
+            self.configs_by_name = configs_by_name
+        return self.configs_by_name
+
     async def from_info(
         self, info: Info, node: M.FieldNode | M.InlineFragmentNode
     ) -> QueryBuilder | None:
         if not node:
             return None
         qb = QueryBuilder()
-        children_q = [*node.children]
-        while len(children_q) > 0:
-            child = children_q.pop(0)
-            if isinstance(child, M.InlineFragmentNode):
-                children_q.extend(child.children)
-            else:
-                if child.name in self.properties:
-                    property_config = self.properties[child.name]
-                    if db_name := property_config.db_name:
-                        if child.name != db_name:
-                            qb.fields.add(f"{child.name} := .{db_name}")
-                        else:
-                            qb.fields.add(db_name)
-                    if update_qb := property_config.update_qb:
-                        kwargs = {
-                            "qb": qb,
-                            "node": node,
-                            "child_node": child,
-                            "info": info,
-                            **{
-                                a.name: parse_value(
-                                    variables=info.context.variables, v=a.value
+        configs_by_name = self.get_configs_by_name()
+        variables = info.context.variables
+        for child in iter_field_nodes(node):
+            configs = configs_by_name.get(child.name)
+            if configs is None:
+                continue
+            property_config, field_expr, method_config = configs
+            if property_config:
+                if field_expr:
+                    qb.fields.add(field_expr)
+                if update_qb := property_config.update_qb:
+                    await call_update_qb(
+                        update_qb,
+                        UPDATE_QB_SLOTS,
+                        parse_arg,
+                        child.arguments,
+                        variables,
+                        qb=qb,
+                        node=node,
+                        child_node=child,
+                        info=info,
+                    )
+            if method_config:
+                original_child = child
+                if method_config.path_to_return_cls:
+                    child = node_from_path(
+                        node=child, path=[*method_config.path_to_return_cls]
+                    )
+                if config := method_config.return_cls_qb_config:
+                    if isinstance(config, dict):
+                        dangling_children: list[M.FieldNode] = []
+                        frag_qbs: list[QueryBuilder] = []
+                        for child_child in child.children:
+                            # InlineFragmentNode has no subclasses, FieldNode does
+                            if type(child_child) is M.InlineFragmentNode:
+                                child_child_qb = await config[
+                                    child_child.type_condition
+                                ].from_info(info=info, node=child_child)
+                                child_child_qb.typename = child_child.type_condition
+                                frag_qbs.append(child_child_qb)
+                            elif isinstance(child_child, M.FieldNode):
+                                dangling_children.append(child_child)
+                            else:
+                                raise Exception(
+                                    f"Invalid node for config as dict: {child=}"
                                 )
-                                for a in child.arguments
-                            },
-                        }
-                        kwargs = {
-                            k: v
-                            for k, v in kwargs.items()
-                            if k in inspect.signature(update_qb).parameters
-                        }
-                        _ = update_qb(**kwargs)
-                        if inspect.isawaitable(_):
-                            await _
-                if child.name in self.links:
-                    method_config = self.links[child.name]
-                    original_child = child
-                    if method_config.path_to_return_cls:
-                        child = node_from_path(
-                            node=child, path=[*method_config.path_to_return_cls]
+                        # now combine the dangling with the frags
+                        child_qb = combine_qbs(
+                            *frag_qbs, nodes_to_include=dangling_children
+                        )
+                        child_qb.fields.add("typename := .__type__.name")
+                    else:
+                        child_qb = await config.from_info(info=info, node=child)
+                    if db_name := method_config.db_name:
+                        name_to_use = child.alias or child.name
+                        db_expression = (
+                            None if name_to_use == db_name else f".{db_name}"
+                        )
+                        qb.children[name_to_use] = ChildEdge(
+                            db_expression=db_expression, qb=child_qb
+                        )
+                    if update_qbs := method_config.update_qbs:
+                        await call_update_qb(
+                            update_qbs,
+                            UPDATE_QB_SLOTS,
+                            parse_arg,
+                            original_child.arguments,
+                            variables,
+                            qb=qb,
+                            child_qb=child_qb,
+                            node=node,
+                            child_node=child,
+                            info=info,
                         )
-                    if config := method_config.return_cls_qb_config:
-                        if isinstance(config, dict):
-                            dangling_children: list[M.FieldNode] = []
-                            frag_qbs: list[QueryBuilder] = []
-                            for child_child in child.children:
-                                if isinstance(child_child, M.InlineFragmentNode):
-                                    child_child_qb = await config[
-                                        child_child.type_condition
-                                    ].from_info(info=info, node=child_child)
-                                    child_child_qb.typename = child_child.type_condition
-                                    frag_qbs.append(child_child_qb)
-                                elif isinstance(child_child, M.FieldNode):
-                                    dangling_children.append(child_child)
-                                else:
-                                    raise Exception(
-                                        f"Invalid node for config as dict: {child=}"
-                                    )
-                            # now combine the dangling with the frags
-                            child_qb = combine_qbs(
-                                *frag_qbs, nodes_to_include=dangling_children
-                            )
-                            child_qb.fields.add("typename := .__type__.name")
-                        else:
-                            child_qb = await config.from_info(info=info, node=child)
-                        if db_name := method_config.db_name:
-                            name_to_use = child.alias or child.name
-                            db_expression = (
-                                None if name_to_use == db_name else f".{db_name}"
-                            )
-                            qb.children[name_to_use] = ChildEdge(
-                                db_expression=db_expression, qb=child_qb
-                            )
-                        if update_qbs := method_config.update_qbs:
-                            kwargs = {
-                                "qb": qb,
-                                "child_qb": child_qb,
-                                "node": node,
-                                "child_node": child,
-                                "info": info,
-                                **{
-                                    a.name: parse_value(
-                                        variables=info.context.variables, v=a.value
-                                    )
-                                    for a in original_child.arguments
-                                },
-                            }
-                            kwargs = {
-                                k: v
-                                for k, v in kwargs.items()
-                                if k in inspect.signature(update_qbs).parameters
-                            }
-                            _ = update_qbs(**kwargs)
-                            if inspect.isawaitable(_):
-                                await _
         return qb
@@ -1,9 +1,12 @@
 import typing as T
 from enum import Enum
-import random
-import string
-import re
-from pydantic import BaseModel, Field
+from dataclasses import dataclass, field
+
+from fastgql.query_builders.utils import (
+    PATTERN_COUNTER,
+    rename_var_refs,
+    sanitize_child_name,
+)
 
 
 class FilterConnector(str, Enum):
@@ -15,17 +18,19 @@ class QueryBuilderError(Exception):
     pass
 
 
-class ChildEdge(BaseModel):
+@dataclass(slots=True)
+class ChildEdge:
     # for example, .artists
     db_expression: str | None
     qb: "QueryBuilder"
 
 
-class QueryBuilder(BaseModel):
+@dataclass(slots=True)
+class QueryBuilder:
     typename: str | None = None
-    fields: set[str] = Field(default_factory=set)
-    variables: dict[str, T.Any] = Field(default_factory=dict)
-    children: dict[str, ChildEdge] = Field(default_factory=dict)
+    fields: set[str] = field(default_factory=set)
+    variables: dict[str, T.Any] = field(default_factory=dict)
+    children: dict[str, ChildEdge] = field(default_factory=dict)
     filter: str | None = None
     order_by: str | None = None
     offset: str | None = None
@@ -38,45 +43,70 @@ class QueryBuilder(BaseModel):
     def build_child_var_name(
         child_name: str, var_name: str, variables_to_use: dict[str, T.Any]
     ) -> str:
-        child_name = re.sub(r"[^a-zA-Z0-9]+", "_", child_name)
+        """only called once var_name is taken, so it starts at the prefixed name"""
+        child_name = sanitize_child_name(child_name)
+        new_var_name = f"_{child_name}_{var_name}"
         count = 0
-        while var_name in variables_to_use:
-            count_str = "" if not count else f"_{count}"
-            var_name = f"_{child_name}{count_str}_{var_name}"
-        return var_name
-
-    def build(self) -> tuple[str, dict[str, T.Any]]:
-        variables_to_use = self.variables.copy()
-        child_strs: set[str] = set()
+        while new_var_name in variables_to_use:
+            count += 1
+            new_var_name = f"_{child_name}_{count}_{var_name}"
+        return new_var_name
+
+    def build(self, copy_variables: bool = True) -> tuple[str, dict[str, T.Any]]:
+        """copy_variables=False lets a leaf hand back self.variables itself, for a
+        parent that only reads them"""
+        if self.children or copy_variables:
+            variables_to_use = self.variables.copy()
+        else:
+            variables_to_use = self.variables
+        # fields is a set, so it still needs sorting for a deterministic query string.
+        # children are keyed by name, so they are unique and already in a stable order
+        # and get appended straight onto the sorted fields
+        shape_parts: list[str] = sorted(self.fields)
         for child_name, child_edge in self.children.items():
             child = child_edge.qb
-            child_str, child_variables = child.build()
-            for var_name, var_val in child_variables.items():
-                if var_name in variables_to_use:
-                    if var_val is variables_to_use[var_name]:
-                        continue
-                    # must change the name for the child
-                    new_var_name = self.build_child_var_name(
-                        child_name=child_name,
-                        var_name=var_name,
-                        variables_to_use=variables_to_use,
-                    )
-                    variables_to_use[new_var_name] = var_val
-                    # now, must regex the str to find this and replace it
-                    regex = re.compile(r"\${}(?!\w)".format(var_name))
-                    child_str = regex.sub(f"${new_var_name}", child_str)
-                else:
-                    variables_to_use[var_name] = var_val
+            child_str, child_variables = child.build(copy_variables=False)
+            if variables_to_use.keys().isdisjoint(child_variables):
+                # the common case, nothing to rename
+                variables_to_use.update(child_variables)
+            else:
+                renames: dict[str, str] = {}
+                for var_name, var_val in child_variables.items():
+                    if var_name in variables_to_use:
+                        if var_val is variables_to_use[var_name]:
+                            continue
+                        # must change the name for the child
+                        new_var_name = self.build_child_var_name(
+                            child_name=child_name,
+                            var_name=var_name,
+                            variables_to_use=variables_to_use,
+                        )
+                        variables_to_use[new_var_name] = var_val
+                        renames[var_name] = new_var_name
+                    else:
+                        variables_to_use[var_name] = var_val
+                if renames:
+                    child_str = rename_var_refs(child_str, renames)
             if not child_edge.db_expression:
                 child_str = f"{child_name}: {child_str}"
             else:
                 child_str = (
                     f"{child_name} := (select {child_edge.db_expression} {child_str})"
                 )
-            child_strs.add(child_str)
-
-        fields_str = ", ".join([*sorted(self.fields), *sorted(child_strs)])
-        s_parts = ["" if not fields_str else f"{{ {fields_str} }}"]
+            shape_parts.append(child_str)
+
+        fields_str = ", ".join(shape_parts)
+        shape_str = "" if not fields_str else f"{{ {fields_str} }}"
+        if not (
+            self.filter
+            or self.order_by
+            or self.offset is not None
+            or self.limit is not None
+            or self.full_query_str
+        ):
+            # most nested builders are just a shape
+            return shape_str, variables_to_use
+        s_parts = [shape_str]
         if self.filter:
             s_parts.append(f"FILTER {self.filter}")
         if self.order_by:
@@ -108,13 +138,11 @@ class QueryBuilder(BaseModel):
         """if there is an error, it does not save to the builder"""
         if not variables:
             return self
-        if not replace:
-            for k in variables.keys():
-                if k in self.variables:
-                    raise QueryBuilderError(
-                        f"Key {k} already exists in variables so you cannot add it. "
-                        f"If you'd like to replace it, pass replace."
-                    )
+        if not replace and (overlap := self.variables.keys() & variables.keys()):
+            raise QueryBuilderError(
+                f"Key {next(iter(overlap))} already exists in variables so you cannot add it. "
+                f"If you'd like to replace it, pass replace."
+            )
         self.variables.update(variables)
         return self
 
@@ -181,9 +209,7 @@ class QueryBuilder(BaseModel):
         if self.full_query_str and not replace:
             raise QueryBuilderError("full_query_str already exists.")
         self.add_variables(variables=variables, replace=replace_variables)
-        pattern_to_replace = "".join(
-            random.choice(string.ascii_letters + string.digits) for _ in range(10)
-        )
+        pattern_to_replace = f"__fgql_pat_{next(PATTERN_COUNTER)}__"
         self.full_query_str = full_query_str.replace("$$", pattern_to_replace)
         self.pattern_to_replace = pattern_to_replace
         return self
@@ -1,6 +1,7 @@
 import typing as T
 import types
 import time
+import logging
 import inspect
 import graphql
 from pydantic import BaseModel
@@ -11,16 +12,15 @@ from fastgql.info import Info
 from .config import QueryBuilderConfig, Link, Property, Cardinality
 from .query_builder import QueryBuilder
 
+logger = logging.getLogger(__name__)
+
 
 def get_qb_config_from_gql_field(
     gql_field: graphql.GraphQLField, path_to_return_cls: tuple[str, ...] = None
 ) -> QueryBuilderConfig:
     root = get_root_type(gql_field)
-    if path_to_return_cls:
-        path = [*path_to_return_cls]
-        while path:
-            p = path.pop(0)
-            root = get_root_type(root.fields[p])
+    for p in path_to_return_cls or ():
+        root = get_root_type(root.fields[p])
     if isinstance(root, list):
         child_qb_config = {cm.name: cm._pydantic_model.qb_config_sql for cm in root}
     else:
@@ -29,8 +29,7 @@ def get_qb_config_from_gql_field(
 
 
 def build_from_schema(schema: graphql.GraphQLSchema) -> None:
-    start = time.time()
-    print("starting to build gql")
+    start = time.perf_counter()
     gql_models = [
         m
         for m in schema.type_map.values()
@@ -64,16 +63,19 @@ def build_from_schema(schema: graphql.GraphQLSchema) -> None:
                         )
                     config.links[field_name] = meta
         # now do functions
+        fields_by_og_name: dict[str, graphql.GraphQLField] | None = None
         for name, member in inspect.getmembers(pydantic_model):
             if inspect.isfunction(member):
                 return_annotation = inspect.signature(member).return_annotation
-                if isinstance(return_annotation, (T.Annotated, T._AnnotatedAlias)):
-                    for meta in return_annotation.__metadata__:
+                # only Annotated return types carry __metadata__
+                if metadata := getattr(return_annotation, "__metadata__", None):
+                    for meta in metadata:
                         if isinstance(meta, Link):
                             if not meta.return_cls_qb_config:
-                                fields_by_og_name = {
-                                    f._og_name: f for f in gql_model.fields.values()
-                                }
+                                if fields_by_og_name is None:
+                                    fields_by_og_name = {
+                                        f._og_name: f for f in gql_model.fields.values()
+                                    }
                                 meta.return_cls_qb_config = (
                                     get_qb_config_from_gql_field(
                                         fields_by_og_name[name],
@@ -86,8 +88,9 @@ def build_from_schema(schema: graphql.GraphQLSchema) -> None:
 
     # for gql_model in gql_models:
     #     debug(gql_model._pydantic_model.qb_config_sql)
-    print(
-        f"[SQL QB CONFIG BUILDING] building the qb configs took: {(time.time() - start) * 1000} ms"
+    logger.debug(
+        "[SQL QB CONFIG BUILDING] building the qb configs took: %s ms",
+        (time.perf_counter() - start) * 1000,
     )
 
 
@@ -1,10 +1,16 @@
 import typing as T
 from enum import Enum
-import random
-import string
 import re
-from pydantic import BaseModel, Field
-import sqlparse
+import functools
+import operator
+from dataclasses import dataclass, field
+
+from fastgql.query_builders.utils import (
+    PATTERN_COUNTER,
+    VAR_REF_RE,
+    rename_var_refs,
+    sanitize_child_name,
+)
 
 
 class PostgresDriver(str, Enum):
@@ -20,18 +26,49 @@ def chunk_list(lst: list[ListT], chunk_size: int) -> list[list[ListT]]:
     return [lst[i : i + chunk_size] for i in range(0, len(lst), chunk_size)]
 
 
+# only used when lowercasing changes the length of the text
+WHERE_RE = re.compile(r"(?i)\bwhere\b")
+
+
+def is_word_char(c: str) -> bool:
+    return c.isalnum() or c == "_"
+
+
+# from_ strs come from a fixed set of Link configs, so the same few get split on every query
+@functools.lru_cache(maxsize=1024)
 def split_text_around_where(text: str) -> tuple[str, str | None]:
-    # Regex pattern to split the string around 'where' (case-insensitive)
-    pattern = r"(?i)\bwhere\b"
+    """splits around the first standalone 'where' (any case), scanning with str.find"""
+    low = text.lower()
+    if len(low) != len(text):
+        parts = WHERE_RE.split(text, maxsplit=1)
+        return parts[0].strip(), parts[1].strip() if len(parts) > 1 else None
+    i = low.find("where")
+    while i != -1:
+        end = i + 5
+        if (i == 0 or not is_word_char(text[i - 1])) and (
+            end == len(text) or not is_word_char(text[end])
+        ):
+            return text[:i].strip(), text[end:].strip()
+        i = low.find("where", i + 1)
+    return text.strip(), None
+
+
+PSYCOPG_PARAM_RE = re.compile(r"(?:\$|(?<!:):(?!:))(\w+)")
+
+
+# the same graphql query builds the same sql, and sqlparse is slow
+@functools.lru_cache(maxsize=256)
+def format_sql_str(s: str) -> str:
+    # sqlparse is only needed with format_sql, so it is not imported with the module
+    import sqlparse
 
-    # Splitting the string
-    parts = re.split(pattern, text, maxsplit=1)
+    return sqlparse.format(s, reindent=True, keyword_case="upper")
 
-    # Stripping whitespace from both parts
-    before_where = parts[0].strip()
-    after_where = parts[1].strip() if len(parts) > 1 else None
 
-    return before_where, after_where
+@functools.lru_cache(maxsize=1024)
+def alias_part(table_name: str) -> str:
+    """a table name as it appears in generated aliases"""
+    return table_name.replace('"', "").replace(".", "__")
 
 
 class FilterConnector(str, Enum):
@@ -48,7 +85,8 @@ class Cardinality(str, Enum):
     MANY = "MANY"
 
 
-class Selection(BaseModel):
+@dataclass(slots=True, kw_only=True)
+class Selection:
     name: str
 
     @property
@@ -58,30 +96,34 @@ class Selection(BaseModel):
         return self.name == self.path or self.path == f"$current.{self.name}" or self.path == f'"{self.path}"' or self.path == f'$current."{self.name}"'
 
 
+@dataclass(slots=True, kw_only=True)
 class SelectionField(Selection):
     path: str
     variables: dict[str, T.Any] | None = None
 
 
+@dataclass(slots=True, kw_only=True)
 class SelectionSub(Selection):
     qb: "QueryBuilder"
 
 
-class CTE(BaseModel):
+@dataclass(slots=True, kw_only=True)
+class CTE:
     cte_str: str
     join_str: str
     is_top_level: bool = True
 
 
-class QueryBuilder(BaseModel):
+@dataclass(slots=True, kw_only=True)
+class QueryBuilder:
     table_name: str
     table_alias: str | None = None
 
     cardinality: Cardinality
-    selections: list[SelectionField | SelectionSub] = Field(default_factory=list)
-    variables: dict[str, T.Any] = Field(default_factory=dict)
+    selections: list[SelectionField | SelectionSub] = field(default_factory=list)
+    variables: dict[str, T.Any] = field(default_factory=dict)
 
-    ctes: list[CTE] = Field(default_factory=list)
+    ctes: list[CTE] = field(default_factory=list)
 
     from_: str | None = None
     where: str | None = None
@@ -99,12 +141,14 @@ class QueryBuilder(BaseModel):
     def build_child_var_name(
         child_name: str, var_name: str, variables_to_use: dict[str, T.Any]
     ) -> str:
-        child_name = re.sub(r"[^a-zA-Z0-9]+", "_", child_name)
+        """only called once var_name is taken, so it starts at the prefixed name"""
+        child_name = sanitize_child_name(child_name)
+        new_var_name = f"_{child_name}_{var_name}"
         count = 0
-        while var_name in variables_to_use:
-            count_str = "" if not count else f"_{count}"
-            var_name = f"_{child_name}{count_str}_{var_name}"
-        return var_name
+        while new_var_name in variables_to_use:
+            count += 1
+            new_var_name = f"_{child_name}_{count}_{var_name}"
+        return new_var_name
 
     def add_variable(
         self, key: str, val: T.Any, replace: bool = False
@@ -124,9 +168,9 @@ class QueryBuilder(BaseModel):
         """if there is an error, it does not save to the builder"""
         if not variables:
             return self
-        if not replace:
-            for k, v in variables.items():
-                if k in self.variables and v != self.variables[k]:
+        if not replace and (overlap := self.variables.keys() & variables.keys()):
+            for k in overlap:
+                if variables[k] != self.variables[k]:
                     raise QueryBuilderError(
                         f"Key '{k}' already exists in variables so you cannot add it. "
                         f"If you'd like to replace it, pass replace."
@@ -230,9 +274,7 @@ class QueryBuilder(BaseModel):
         if self.full_query_str and not replace:
             raise QueryBuilderError("full_query_str already exists.")
         self.add_variables(variables=variables, replace=replace_variables)
-        pattern_to_replace = "".join(
-            random.choice(string.ascii_letters + string.digits) for _ in range(10)
-        )
+        pattern_to_replace = f"__fgql_pat_{next(PATTERN_COUNTER)}__"
         self.full_query_str = full_query_str.replace("$$", pattern_to_replace)
         self.pattern_to_replace = pattern_to_replace
         return self
@@ -245,28 +287,36 @@ class QueryBuilder(BaseModel):
         parent_table_alias: str,
         variables: dict,
         order_fields_alphabetically: bool,
+        path_alias: str | None = None,
     ) -> str:
         s, v = qb.build(
+            copy_variables=False,
             parent_table_alias=parent_table_alias,
             path=path,
+            path_alias=path_alias,
             order_fields_alphabetically=order_fields_alphabetically,
         )
-        for var_name, var_val in v.items():
-            if var_name in variables:
-                if var_val is variables[var_name]:
-                    continue
-                # must change the name for the child
-                new_var_name = self.build_child_var_name(
-                    child_name=name,
-                    var_name=var_name,
-                    variables_to_use=variables,
-                )
-                variables[new_var_name] = var_val
-                # now, must regex the str to find this and replace it
-                regex = re.compile(r"\${}(?!\w)".format(var_name))
-                s = regex.sub(f"${new_var_name}", s)
-            else:
-                variables[var_name] = var_val
+        if variables.keys().isdisjoint(v):
+            # the common case, nothing to rename
+            variables.update(v)
+        else:
+            renames: dict[str, str] = {}
+            for var_name, var_val in v.items():
+                if var_name in variables:
+                    if var_val is variables[var_name]:
+                        continue
+                    # must change the name for the child
+                    new_var_name = self.build_child_var_name(
+                        child_name=name,
+                        var_name=var_name,
+                        variables_to_use=variables,
+                    )
+                    variables[new_var_name] = var_val
+                    renames[var_name] = new_var_name
+                else:
+                    variables[var_name] = var_val
+            if renames:
+                s = rename_var_refs(s, renames)
 
         s = f"'{name}', ({s})"
         return s
@@ -276,34 +326,61 @@ class QueryBuilder(BaseModel):
         new_path: tuple[str, ...],
         table_alias: str,
         order_fields_alphabetically: bool,
+        new_path_alias: str | None = None,
+        parent_table_alias: str | None = None,
+        copy_variables: bool = True,
     ) -> tuple[list[str], dict[str, T.Any]]:
-        variables = self.variables.copy()
-        subquery_strs: list[str] = [
-            self.build_subquery(
-                name=sel_sub.name,
-                qb=sel_sub.qb,
-                path=new_path,
-                variables=variables,
-                parent_table_alias=table_alias,
-                order_fields_alphabetically=order_fields_alphabetically,
+        """subquery strs come back from their own build already replaced, so only the
+        selection fields get $current and $parent replaced here"""
+        # only builders with subqueries add to the variables, so unless a copy is asked
+        # for, leaves hand back their own dict
+        if copy_variables or any(
+            isinstance(sel, SelectionSub) for sel in self.selections
+        ):
+            variables = self.variables.copy()
+        else:
+            variables = self.variables
+        # (name, formatted) pairs so the sort only compares names
+        named_strs: list[tuple[str, str]] = [
+            (
+                sel.name,
+                self.replace_current_and_parent(
+                    s=f"'{sel.name}', {sel.path}",
+                    table_alias=table_alias,
+                    parent_table_alias=parent_table_alias,
+                ),
             )
-            for sel_sub in self.selections
-            if isinstance(sel_sub, SelectionSub)
-        ]
-        selection_strs: list[str] = [
-            f"'{sel.name}', {sel.path}"
             for sel in self.selections
             if isinstance(sel, SelectionField)
         ]
-        all_fields_strs = [*selection_strs, *subquery_strs]
-        if order_fields_alphabetically:
-            all_fields_strs.sort()
-        if not all_fields_strs:
+        named_strs.extend(
+            (
+                sel_sub.name,
+                self.build_subquery(
+                    name=sel_sub.name,
+                    qb=sel_sub.qb,
+                    path=new_path,
+                    path_alias=new_path_alias,
+                    variables=variables,
+                    parent_table_alias=table_alias,
+                    order_fields_alphabetically=order_fields_alphabetically,
+                ),
+            )
+            for sel_sub in self.selections
+            if isinstance(sel_sub, SelectionSub)
+        )
+        if not named_strs:
             raise QueryBuilderError(f"Query Builder {self=} has no fields.")
+        if order_fields_alphabetically:
+            named_strs.sort(key=operator.itemgetter(0))
+        all_fields_strs = [s for _, s in named_strs]
 
         return all_fields_strs, variables
 
     def build_filter_parts_s(self) -> str:
+        if not (self.where or self.order_by or self.offset or self.limit):
+            # most nested builders only join on their from_, no list to build
+            return ""
         filter_parts: list[str] = []
         if self.where:
             filter_parts.append(f"WHERE {self.where}")
@@ -339,7 +416,12 @@ class QueryBuilder(BaseModel):
         order_fields_alphabetically: bool = True,
         is_count: bool | None = None,
         use_top_level_ctes: bool = True,
+        path_alias: str | None = None,
+        copy_variables: bool = True,
     ) -> tuple[str, dict[str, T.Any]]:
+        """path_alias is the alias of path, handed down by the parent so deep nesting
+        does not rebuild it from the whole path at every level. copy_variables=False
+        lets a leaf hand back self.variables itself, for callers that only read them"""
         is_count = is_count if is_count is not None else self.is_count
         if is_count:
             if self.limit is not None:
@@ -348,12 +430,16 @@ class QueryBuilder(BaseModel):
                 raise QueryBuilderError("Cannot be is_count and have an offset.")
         if path:
             new_path = (*path, self.table_name)
+            if path_alias is None:
+                path_alias = "__".join([alias_part(p) for p in path])
+            new_path_alias = f"{path_alias}__{alias_part(self.table_name)}"
         else:
             new_path = (self.table_name,)
+            new_path_alias = alias_part(self.table_name)
         if self.table_alias:
             table_alias = self.table_alias
         else:
-            table_alias = "__".join(new_path).replace('"', "").replace(".", "__")
+            table_alias = new_path_alias
         if not path:
             if table_alias.lower() == self.table_name.lower().replace('"', ""):
                 table_alias = f"_{table_alias}"
@@ -361,16 +447,28 @@ class QueryBuilder(BaseModel):
             new_path=new_path,
             table_alias=table_alias,
             order_fields_alphabetically=order_fields_alphabetically,
+            new_path_alias=new_path_alias,
+            parent_table_alias=parent_table_alias,
+            copy_variables=copy_variables,
         )
-        filter_parts_s = self.build_filter_parts_s()
-        # now do from_
+
+        # $current and $parent are replaced in this builder's own parts only, the
+        # subqueries are already done so the nested sql is not rescanned at every level
+        def replace_refs(part: str) -> str:
+            return self.replace_current_and_parent(
+                s=part, table_alias=table_alias, parent_table_alias=parent_table_alias
+            )
+
+        filter_parts_s = replace_refs(self.build_filter_parts_s())
+        # now do from_, into a local so building twice gives the same sql
+        default_from = f"FROM {self.table_name} {table_alias}"
         if not self.from_:
-            self.from_ = "*FROM*"
-        self.from_ = self.from_.replace(
-            "*FROM*", f"FROM {self.table_name} {table_alias}"
-        )
-        if not self.from_ or not self.from_.lower().startswith("from "):
-            self.from_ = f"FROM {self.table_name} {table_alias} {self.from_}"
+            from_clause = default_from
+        else:
+            from_clause = self.from_.replace("*FROM*", default_from)
+            # only the first 5 chars matter, no need to lowercase the whole clause
+            if from_clause[:5].lower() != "from ":
+                from_clause = f"{default_from} {from_clause}"
 
         # if this is the top level, use top level CTES. Otherwise, ignore them
         if use_top_level_ctes:
@@ -378,16 +476,15 @@ class QueryBuilder(BaseModel):
         else:
             ctes_to_use = [cte for cte in self.ctes if not cte.is_top_level]
 
-        cte_str = ",\n".join([cte.cte_str for cte in ctes_to_use])
-        cte_join_str = "\n".join([cte.join_str for cte in ctes_to_use])
+        cte_str = replace_refs(",\n".join([cte.cte_str for cte in ctes_to_use]))
+        cte_join_str = replace_refs("\n".join([cte.join_str for cte in ctes_to_use]))
 
         # now build the json objects by chunking the keys + vals at 50
-        chunks = chunk_list(lst=strs_list, chunk_size=50)
-        if len(chunks) == 1:
-            json_obj_str = f'json_build_object({", ".join(chunks[0])})'
+        if len(strs_list) <= 50:
+            json_obj_str = f'json_build_object({", ".join(strs_list)})'
         else:
             json_obj_strs: list[str] = []
-            for chunk in chunks:
+            for chunk in chunk_list(lst=strs_list, chunk_size=50):
                 json_obj_strs.append(f'jsonb_build_object({", ".join(chunk)})')
             json_obj_str = " || ".join(json_obj_strs)
         if is_count:
@@ -395,7 +492,7 @@ class QueryBuilder(BaseModel):
         s = f"""
 {cte_str}
 SELECT {json_obj_str} AS {table_alias}_json
-{self.from_}
+{replace_refs(from_clause)}
 {cte_join_str}
 {filter_parts_s}
 """.strip()
@@ -408,11 +505,7 @@ SELECT {json_obj_str} AS {table_alias}_json
     ) as {table_alias}_json_sub
                 """.strip()
         if self.full_query_str:
-            s = self.full_query_str.replace(self.pattern_to_replace, s)
-        # now replace the values
-        s = self.replace_current_and_parent(
-            s=s, table_alias=table_alias, parent_table_alias=parent_table_alias
-        )
+            s = replace_refs(self.full_query_str).replace(self.pattern_to_replace, s)
         return s, variables
 
     def build_root(
@@ -424,7 +517,9 @@ SELECT {json_obj_str} AS {table_alias}_json
         driver: PostgresDriver = PostgresDriver.SQLALCHEMY,
         is_count: bool | None = None,
     ) -> tuple[str, dict[T.Any]]:
+        # the prepare_query_* fns return new containers, so no copy is needed here
         rr = self.build(
+            copy_variables=False,
             order_fields_alphabetically=order_fields_alphabetically,
             parent_table_alias=parent_table_alias,
             path=path,
@@ -443,7 +538,7 @@ SELECT {json_obj_str} AS {table_alias}_json
         else:
             variables = {}
         if format_sql:
-            s = sqlparse.format(s, reindent=True, keyword_case="upper")
+            s = format_sql_str(s)
         return s, variables
 
     @staticmethod
@@ -461,17 +556,19 @@ SELECT {json_obj_str} AS {table_alias}_json
         :return: Tuple of (new_sql_string, list_of_values)
         """
 
-        # Extract the named parameters from the SQL string
-        named_params = re.findall(r"\$(\w+)", sql)
-        # Ensure that each parameter is unique
-        unique_params = list(dict.fromkeys(named_params))
+        # Number each unique named parameter as it is first seen, collecting its
+        # value at the same time, so one pass over the SQL does everything
+        positions: dict[str, int] = {}
+        values: list[T.Any] = []
 
-        # Replace named parameters with positional parameters ($1, $2, etc.)
-        for i, param in enumerate(unique_params, start=1):
-            sql = sql.replace(f"${param}", f"${i}")
+        def to_positional(m: re.Match) -> str:
+            param = m[1]
+            if (i := positions.get(param)) is None:
+                values.append(params[param])
+                i = positions[param] = len(values)
+            return f"${i}"
 
-        # Create the list of values in the order they appear in the query
-        values = [params[param] for param in unique_params]
+        sql = VAR_REF_RE.sub(to_positional, sql)
 
         return sql, values
 
@@ -489,14 +586,9 @@ SELECT {json_obj_str} AS {table_alias}_json
         :return: Tuple of (new_sql_string, dict_of_parameters)
         """
 
-        # Extract the named parameters from the SQL string
-        named_params = re.findall(r"[\$:]([\w]+)", sql)
-
-        # Replace named parameters with %(param)s
-        for param in named_params:
-            sql = sql.replace(f"${param}", f"%({param})s")
-            # TODO be careful with this lower one
-            sql = sql.replace(f":{param}", f"%({param})s")
+        # Replace $param and :param with %(param)s in one pass. ::type casts are not
+        # parameters, so a colon next to another colon is left alone
+        sql = PSYCOPG_PARAM_RE.sub(r"%(\1)s", sql)
         return sql, {**params}
 
     @staticmethod
@@ -513,12 +605,8 @@ SELECT {json_obj_str} AS {table_alias}_json
         :return: Tuple of (new_sql_string, dict_of_parameters)
         """
 
-        # Extract the named parameters from the SQL string
-        named_params = re.findall(r"\$(\w+)", sql)
-
-        # Replace named parameters with %(param)s
-        for param in named_params:
-            sql = sql.replace(f"${param}", f":{param}")
+        # Replace named parameters with :param
+        sql = VAR_REF_RE.sub(r":\1", sql)
 
         # Create the dictionary of parameters to be used in the query
         return sql, {**params}
@@ -0,0 +1,92 @@
+import typing as T
+import inspect
+import re
+import functools
+import itertools
+
+from fastgql.gql_ast import models as M
+
+# a $name variable reference, in edgeql and in the sql the builders write
+VAR_REF_RE = re.compile(r"\$(\w+)")
+
+
+def rename_var_refs(s: str, renames: dict[str, str]) -> str:
+    """rewrites every $old in s to $new in a single pass"""
+    return VAR_REF_RE.sub(lambda m: f"${renames.get(m[1], m[1])}", s)
+
+
+NON_ALNUM_RE = re.compile(r"[^a-zA-Z0-9]+")
+
+
+@functools.lru_cache(maxsize=1024)
+def sanitize_child_name(child_name: str) -> str:
+    """child names repeat across queries, so the cleaned up name is cached"""
+    return NON_ALNUM_RE.sub("_", child_name)
+
+
+# placeholders for $$ in full query strs, unique per process
+PATTERN_COUNTER = itertools.count()
+
+# update_qb(s) callbacks can be swapped on a config at any time, so what is known about
+# them is cached per callback rather than stored on the config
+cached_iscoroutinefunction = functools.cache(inspect.iscoroutinefunction)
+
+KwargsBuilder = T.Callable[..., dict[str, T.Any]]
+
+# (fn, argument name, value, variables) -> the value fn is called with for that argument
+ArgCoercer = T.Callable[
+    [T.Callable[..., T.Any], str, T.Any, dict[str, T.Any] | None], T.Any
+]
+
+
+@functools.cache
+def make_kwargs_builder(
+    fn: T.Callable[..., T.Any],
+    slots: frozenset[str],
+    coerce_arg: ArgCoercer | None = None,
+) -> KwargsBuilder:
+    """inspects fn once and returns a function that builds only the kwargs fn accepts.
+    slots are what from_info can pass besides the field's arguments, every other
+    parameter of fn is read from the arguments and passed through coerce_arg"""
+    params = frozenset(inspect.signature(fn).parameters)
+    slot_names = tuple(params & slots)
+    arg_names = params - slots
+
+    def build_kwargs(
+        arguments: list[M.Argument],
+        variables: dict[str, T.Any] | None = None,
+        **slot_values: T.Any,
+    ) -> dict[str, T.Any]:
+        kwargs = {name: slot_values[name] for name in slot_names if name in slot_values}
+        if not arg_names:
+            # most callbacks only take qb/child_qb, nothing to parse
+            return kwargs
+        for a in arguments:
+            if a.name in arg_names:
+                kwargs[a.name] = (
+                    coerce_arg(fn, a.name, a.value, variables)
+                    if coerce_arg
+                    else a.value
+                )
+        return kwargs
+
+    return build_kwargs
+
+
+async def call_update_qb(
+    update_qb: T.Callable[..., T.Any],
+    slots: frozenset[str],
+    coerce_arg: ArgCoercer | None,
+    arguments: list[M.Argument],
+    variables: dict[str, T.Any] | None = None,
+    **slot_values: T.Any,
+) -> None:
+    """calls an update_qb(s) callback with only the kwargs it accepts, awaiting it if
+    needed. Nothing is stored on the config, so a swapped callback is picked up"""
+    build_kwargs = make_kwargs_builder(update_qb, slots, coerce_arg)
+    _ = update_qb(**build_kwargs(arguments, variables, **slot_values))
+    # sync callbacks almost always return None, only probe what they do return
+    if cached_iscoroutinefunction(update_qb) or (
+        _ is not None and inspect.isawaitable(_)
+    ):
+        await _
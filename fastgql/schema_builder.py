@@ -2,7 +2,6 @@ import typing as T
 from collections import OrderedDict
 import hashlib
 import re
-import time
 import types
 import datetime
 import enum
@@ -29,7 +28,12 @@ from fastgql.scalars import (
 from fastgql.gql_models import GQL, GQLInput, GQLInterface, GQLError
 from fastgql.info import Info
 from fastgql.depends import Depends
-from fastgql.execute.utils import combine_models, GraphQLRequestData, RESULT_WRAPPERS
+from fastgql.execute.utils import (
+    combine_models,
+    GraphQLRequestData,
+    RESULT_WRAPPERS,
+    to_json_mode,
+)
 from fastgql.execute.executor import Executor, InfoType, ContextType
 from fastgql.query_builders.edgedb import logic as qb_logic
 from fastgql.query_builders.sql import logic as sql_qb_logic
@@ -59,6 +63,9 @@ GT = T.TypeVar("GT", bound=graphql.GraphQLType)
 
 enum_cache: dict[T.Type[enum.Enum], graphql.GraphQLEnumType] = {}
 
+# the same field and argument names repeat across models
+cached_to_camel = functools.cache(to_camel)
+
 union_cache: dict[str, graphql.GraphQLUnionType] = {}
 
 
@@ -69,10 +76,12 @@ class MissingQueryError(Exception):
         super().__init__(message)
 
 
+# matches the operation name, leading whitespace is skipped so the query is not copied
+OPERATION_NAME_RE = re.compile(r"\s*(query|mutation|subscription)\s+(\w+)")
+
+
 def get_operation_name(graphql_query: str) -> str | None:
-    # Define a regex pattern to match the operation name
-    pattern = r"^(query|mutation|subscription)\s+(\w+)"
-    match = re.search(pattern, graphql_query.strip())
+    match = OPERATION_NAME_RE.match(graphql_query)
     if match:
         return match.group(2)
     return None
@@ -204,7 +213,7 @@ class SchemaBuilder:
 
     def snake_to_camel(self, s: str) -> str:
         if self.use_camel_case:
-            return to_camel(s)
+            return cached_to_camel(s)
         return s
 
     @functools.cache
@@ -657,7 +666,9 @@ class SchemaBuilder:
                 ]
             else:
                 serialized_errors = None
-            start = time.time()
+            if self.executor.result_wrappers and res.data is not None:
+                # wrappers see the same json values the response has
+                res.data = to_json_mode(res.data)
             result_d = {
                 "data": res.data,
                 "errors": serialized_errors,
@@ -667,8 +678,6 @@ class SchemaBuilder:
                 res = wrapper(request_data, res, result_d, request, response)
                 if inspect.isawaitable(res):
                     res = await res
-            json_r = ORJSONResponse(result_d)
-            print(f"json response parsing took {(time.time() - start) * 1000:.2f} ms")
-            return json_r
+            return ORJSONResponse(result_d)
 
         return router
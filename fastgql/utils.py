@@ -1,18 +1,33 @@
+import typing as T
 import pathlib
+from collections import deque
 import json
 from fastgql.gql_ast import models as M
 
 
+def iter_field_nodes(
+    node: M.FieldNode | M.InlineFragmentNode,
+) -> T.Iterator[M.FieldNode]:
+    """the children of node, with inline fragments flattened in place"""
+    for child in node.children:
+        if type(child) is M.InlineFragmentNode:
+            yield from iter_field_nodes(child)
+        else:
+            yield child
+
+
 def node_from_path(
     node: M.FieldNode, path: list[str], use_field_to_use: bool = False
 ) -> M.FieldNode | None:
     if not path:
         return node
     current_val = path.pop(0)
-    children_q = [*node.children]
-    while len(children_q) > 0:
-        child = children_q.pop(0)
-        if isinstance(child, M.FieldNode):
+    children_q = deque(node.children)
+    while children_q:
+        child = children_q.popleft()
+        if type(child) is M.InlineFragmentNode:
+            children_q.extend(child.children)
+        else:
             name = (
                 child.name
                 if not use_field_to_use
@@ -20,8 +35,6 @@ def node_from_path(
             )
             if name == current_val:
                 return node_from_path(node=child, path=path)
-        if isinstance(child, M.InlineFragmentNode):
-            children_q.extend(child.children)
 
     return None
 
@@ -1,112 +1,173 @@
-import json
+import os
 import time
+import contextlib
 import typing as T
 from uuid import UUID
 import edgedb
 from pydantic import TypeAdapter
 from fastapi import FastAPI
-from fastgql import GQL, GQLInterface, build_router
+from fastgql import GQL, GQLInterface, build_router, Info
 from dotenv import load_dotenv
 
 load_dotenv()
 
-edgedb_client = edgedb.create_async_client()
+# the client keeps a pool of connections that each cache their prepared queries,
+# so it only needs to be big enough for the fan out of one request
+edgedb_client = edgedb.create_async_client(
+    concurrency=int(os.getenv("EDGEDB_CONCURRENCY", 50))
+)
+
+# set TRACE_QUERIES=1 to print how long each query takes
+TRACE_QUERIES = os.getenv("TRACE_QUERIES") == "1"
+
+
+@contextlib.contextmanager
+def trace(name: str) -> T.Iterator[None]:
+    if not TRACE_QUERIES:
+        yield
+        return
+    start = time.perf_counter_ns()
+    yield
+    print(f"[{name}] took {(time.perf_counter_ns() - start) / 1_000_000:.2f} ms")
+
 
 Contents = list[T.Union["Movie", "Show"]]
 
 
-async def query_required_single_json(
+async def query_required_single(
     name: str, query: str, **variables
-) -> dict[str, T.Any]:
-    start = time.time()
-    res = json.loads(
-        await edgedb_client.query_required_single_json(query=query, **variables)
+) -> edgedb.Object:
+    with trace(name):
+        return await edgedb_client.query_required_single(query=query, **variables)
+
+
+async def query_by_ids(
+    name: str, query: str, ids: list[UUID], **variables
+) -> list[edgedb.Object]:
+    """query must filter by .id in array_unpack(<array<uuid>>$ids). Results are returned in the order of ids"""
+    with trace(f"{name} for {len(ids)} ids"):
+        res = await edgedb_client.query(query=query, ids=ids, **variables)
+    by_id = {o.id: o for o in res}
+    return [by_id[id_] for id_ in ids]
+
+
+async def load_watchlists(ids: list[UUID], limit: int) -> list[Contents]:
+    q = """select Account {
+        id,
+        watchlist: { id, title, release_year := [is Movie].release_year } limit <int64>$limit
+    } filter .id in array_unpack(<array<uuid>>$ids)"""
+    accounts = await query_by_ids(
+        name="account.watchlist", query=q, ids=ids, limit=limit
     )
-    took_ms = round((time.time() - start) * 1_000, 2)
-    print(f"[{name}] took {took_ms} ms")
-    return res
+    return [
+        contents_adapter.validate_python(a.watchlist, from_attributes=True)
+        for a in accounts
+    ]
 
 
 class Account(GQL):
     id: UUID
     username: str
 
-    async def watchlist(self, limit: int) -> Contents:
-        q = """select Account {
-            watchlist: { id, title, release_year := [is Movie].release_year } limit <int64>$limit
-        } filter .id = <uuid>$id"""
-        account_d = await query_required_single_json(
-            name="account.watchlist", query=q, id=self.id, limit=limit
+    async def watchlist(self, info: Info, limit: int) -> Contents:
+        loader = info.context.loader(
+            ("account.watchlist", limit), lambda ids: load_watchlists(ids, limit=limit)
         )
-        return TypeAdapter(Contents).validate_python(account_d["watchlist"])
+        return await loader.load(self.id)
+
+
+async def load_filmographies(ids: list[UUID]) -> list[Contents]:
+    q = """select Person {
+        id,
+        filmography: { id, title, release_year := [is Movie].release_year }
+    } filter .id in array_unpack(<array<uuid>>$ids)"""
+    people = await query_by_ids(name="person.filmography", query=q, ids=ids)
+    return [
+        contents_adapter.validate_python(p.filmography, from_attributes=True)
+        for p in people
+    ]
 
 
 class Person(GQL):
     id: UUID
     name: str
 
-    async def filmography(self) -> Contents:
-        q = """select Person {
-            filmography: { id, title, release_year := [is Movie].release_year }
-        } filter .id = <uuid>$id"""
-        person_d = await query_required_single_json(
-            name="person.filmography", query=q, id=self.id
-        )
-        return TypeAdapter(Contents).validate_python(person_d["filmography"])
+    async def filmography(self, info: Info) -> Contents:
+        loader = info.context.loader("person.filmography", load_filmographies)
+        return await loader.load(self.id)
+
+
+async def load_actors(ids: list[UUID]) -> list[list[Person]]:
+    q = """select Content { id, actors: { id, name } } filter .id in array_unpack(<array<uuid>>$ids)"""
+    contents = await query_by_ids(name="content.actors", query=q, ids=ids)
+    return [
+        [Person.model_validate(p, from_attributes=True) for p in c.actors]
+        for c in contents
+    ]
 
 
 class Content(GQLInterface):
     id: UUID
     title: str
 
-    async def actors(self) -> list["Person"]:
-        q = """select Content { actors: { id, name } } filter .id = <uuid>$id"""
-        content_d = await query_required_single_json(
-            name="content.actors", query=q, id=self.id
-        )
-        return [Person(**p) for p in content_d["actors"]]
+    async def actors(self, info: Info) -> list["Person"]:
+        return await info.context.loader("content.actors", load_actors).load(self.id)
 
 
 class Movie(Content):
     release_year: int
 
 
+async def load_seasons(ids: list[UUID]) -> list[list["Season"]]:
+    q = """select Show { id, season := .<show[is Season] { id, number } } filter .id in array_unpack(<array<uuid>>$ids)"""
+    shows = await query_by_ids(name="show.seasons", query=q, ids=ids)
+    return [
+        [Season.model_validate(s, from_attributes=True) for s in show.season]
+        for show in shows
+    ]
+
+
+async def load_num_seasons(ids: list[UUID]) -> list[int]:
+    q = """select Show { id, num_seasons } filter .id in array_unpack(<array<uuid>>$ids)"""
+    shows = await query_by_ids(name="show.num_seasons", query=q, ids=ids)
+    return [show.num_seasons for show in shows]
+
+
 class Show(Content):
-    async def seasons(self) -> list["Season"]:
-        q = """select Show { season := .<show[is Season] { id, number } } filter .id = <uuid>$id"""
-        show_d = await query_required_single_json(
-            name="show.seasons", query=q, id=self.id
-        )
-        return [Season(**s) for s in show_d["season"]]
+    async def seasons(self, info: Info) -> list["Season"]:
+        return await info.context.loader("show.seasons", load_seasons).load(self.id)
 
-    async def num_seasons(self) -> int:
-        q = """select Show { num_seasons } filter .id = <uuid>$id"""
-        show_d = await query_required_single_json(
-            name="show.num_seasons", query=q, id=self.id
-        )
-        return show_d["num_seasons"]
+    async def num_seasons(self, info: Info) -> int:
+        loader = info.context.loader("show.num_seasons", load_num_seasons)
+        return await loader.load(self.id)
+
+
+# built once Movie and Show exist, instead of rebuilding the schema on every call
+contents_adapter = TypeAdapter(Contents)
+
+
+async def load_shows(ids: list[UUID]) -> list[Show]:
+    q = """select Season { id, show: { id, title } } filter .id in array_unpack(<array<uuid>>$ids)"""
+    seasons = await query_by_ids(name="season.show", query=q, ids=ids)
+    return [Show.model_validate(s.show, from_attributes=True) for s in seasons]
 
 
 class Season(GQL):
     id: UUID
     number: int
 
-    async def show(self) -> Show:
-        q = """select Season { show: { id, title } } filter .id = <uuid>$id"""
-        season_d = await query_required_single_json(
-            name="season.show", query=q, id=self.id
-        )
-        return Show(**season_d["show"])
+    async def show(self, info: Info) -> Show:
+        return await info.context.loader("season.show", load_shows).load(self.id)
 
 
 class Query(GQL):
     @staticmethod
     async def account_by_username(username: str) -> Account:
         q = """select Account { id, username } filter .username = <str>$username"""
-        account_d = await query_required_single_json(
+        account = await query_required_single(
             name="account_by_username", query=q, username=username
         )
-        return Account(**account_d)
+        return Account.model_validate(account, from_attributes=True)
 
 
 router = build_router(query_models=[Query])
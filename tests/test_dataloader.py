@@ -0,0 +1,94 @@
+import asyncio
+
+import pytest
+
+from fastgql import DataLoader
+
+
+def make_loader(calls: list[list[int]], fail: bool = False) -> DataLoader[int, int]:
+    async def load_fn(keys: list[int]) -> list[int]:
+        calls.append(keys)
+        await asyncio.sleep(0)
+        if fail:
+            raise ValueError("boom")
+        return [k * 2 for k in keys]
+
+    return DataLoader(load_fn)
+
+
+def test_batches_keys_loaded_together():
+    async def main():
+        calls: list[list[int]] = []
+        dl = make_loader(calls)
+        res = await asyncio.gather(dl.load(1), dl.load(2), dl.load(1), dl.load(3))
+        assert res == [2, 4, 2, 6]
+        assert calls == [[1, 2, 3]]
+        # loaded keys are cached
+        assert await dl.load_many([1, 2]) == [2, 4]
+        assert calls == [[1, 2, 3]]
+
+    asyncio.run(main())
+
+
+def test_error_reaches_every_caller_and_is_not_cached():
+    async def main():
+        calls: list[list[int]] = []
+        dl = make_loader(calls, fail=True)
+        res = await asyncio.gather(dl.load(1), dl.load(2), return_exceptions=True)
+        assert [type(r) for r in res] == [ValueError, ValueError]
+        with pytest.raises(ValueError):
+            await dl.load(1)
+        assert calls == [[1, 2], [1]]
+
+    asyncio.run(main())
+
+
+def test_wrong_number_of_values_is_an_error():
+    async def main():
+        async def load_fn(keys: list[int]) -> list[int]:
+            return []
+
+        dl = DataLoader(load_fn)
+        with pytest.raises(Exception, match="returned 0 values for 1 keys"):
+            await dl.load(1)
+
+    asyncio.run(main())
+
+
+def test_cancelled_caller_does_not_affect_the_batch():
+    async def main():
+        calls: list[list[int]] = []
+        dl = make_loader(calls)
+        t1 = asyncio.ensure_future(dl.load(1))
+        t2 = asyncio.ensure_future(dl.load(2))
+        t1_same_key = asyncio.ensure_future(dl.load(1))
+        t1.cancel()
+        assert await asyncio.wait_for(t2, 1) == 4
+        assert await asyncio.wait_for(t1_same_key, 1) == 2
+        assert t1.cancelled()
+        assert calls == [[1, 2]]
+
+    asyncio.run(main())
+
+
+def test_cancelled_load_fn_cancels_the_batch():
+    async def main():
+        started = asyncio.Event()
+
+        async def load_fn(keys: list[int]) -> list[int]:
+            started.set()
+            await asyncio.sleep(10)
+            return keys
+
+        dl = DataLoader(load_fn)
+        t1 = asyncio.ensure_future(dl.load(1))
+        t2 = asyncio.ensure_future(dl.load(2))
+        await started.wait()
+        for task in dl._tasks:
+            task.cancel()
+        for t in (t1, t2):
+            with pytest.raises(asyncio.CancelledError):
+                await asyncio.wait_for(t, 1)
+        assert not dl.futures
+
+    asyncio.run(main())
@@ -0,0 +1,64 @@
+import pytest
+from graphql import NameNode, VariableNode
+
+from fastgql.execute.utils import CacheDict, parse_value
+
+
+def var(name: str) -> VariableNode:
+    return VariableNode(name=NameNode(value=name))
+
+
+def test_parse_value_fills_nested_variables():
+    v = {
+        "a": [1, var("x"), {"b": var("y"), "c": [var("x"), [var("z")]]}],
+        "d": {"e": {"f": var("z")}},
+        "g": "plain",
+    }
+    variables = {"x": 1, "y": {"k": [1, 2]}, "z": None}
+    parsed = parse_value(variables=variables, v=v)
+    assert parsed == {
+        "a": [1, 1, {"b": {"k": [1, 2]}, "c": [1, [None]]}],
+        "d": {"e": {"f": None}},
+        "g": "plain",
+    }
+    # key order is kept and the input is not changed
+    assert list(parsed) == ["a", "d", "g"]
+    assert list(parsed["a"][2]) == ["b", "c"]
+    assert type(v["a"][1]) is VariableNode
+    assert type(v["d"]["e"]["f"]) is VariableNode
+
+
+def test_parse_value_scalars_and_missing_variables():
+    assert parse_value(variables=None, v=3) == 3
+    assert parse_value(variables={"x": [1]}, v=var("x")) == [1]
+    with pytest.raises(Exception, match="Variable x was not given."):
+        parse_value(variables={}, v=[{"a": var("x")}])
+    with pytest.raises(Exception, match="Variable x was not given."):
+        parse_value(variables=None, v=[var("x")])
+
+
+def test_cache_dict_refreshes_on_get_and_evicts_lru():
+    d = CacheDict({"a": 1, "b": 2}, cache_len=3)
+    d["c"] = 3
+    assert list(d) == ["a", "b", "c"]
+    # reading a key makes it the most recently used
+    assert d["a"] == 1
+    assert d.get("b") == 2
+    assert list(d) == ["c", "a", "b"]
+    d["d"] = 4
+    assert "c" not in d and list(d) == ["a", "b", "d"]
+    # setting an existing key refreshes it too
+    d["a"] = 10
+    d["e"] = 5
+    assert list(d) == ["d", "a", "e"]
+    assert d.get("missing") is None and len(d) == 3
+    assert d["a"] == 10
+    del d["d"]
+    assert list(d) == ["e", "a"]
+    with pytest.raises(KeyError):
+        d["d"]
+
+
+def test_cache_dict_init_is_bounded():
+    d = CacheDict({i: i for i in range(5)}, cache_len=2)
+    assert list(d) == [3, 4]
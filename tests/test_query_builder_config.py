@@ -0,0 +1,147 @@
+import typing as T
+import uuid
+
+import pytest
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from fastgql import GQL, Info, build_router
+from fastgql.query_builders.edgedb import config as edgedb_config
+from fastgql.query_builders.edgedb.logic import get_qb as get_edgedb_qb
+from fastgql.query_builders.edgedb.query_builder import QueryBuilder as EdgeDBQB
+from fastgql.query_builders.sql import config as sql_config
+from fastgql.query_builders.sql.logic import get_qb as get_sql_qb
+from fastgql.query_builders.sql.query_builder import (
+    QueryBuilder as SQLQB,
+    Cardinality,
+)
+
+BUILT: dict[str, T.Any] = {}
+
+edgedb_name = edgedb_config.Property(db_name="full_name")
+sql_name = sql_config.Property(path="$current.name")
+
+
+async def limit_edgedb_friends(child_qb: EdgeDBQB, limit: int | None = None) -> None:
+    child_qb.set_limit(limit)
+
+
+async def limit_sql_friends(child_qb: SQLQB, limit: int | None = None) -> None:
+    child_qb.set_limit(limit)
+
+
+class Cat(GQL):
+    name: T.Annotated[str, sql_config.Property(path="$current.name")]
+    lives: T.Annotated[int, sql_config.Property(path="$current.lives")]
+
+
+class Dog(GQL):
+    name: T.Annotated[str, sql_config.Property(path="$current.name")]
+
+
+class Person(GQL):
+    id: T.Annotated[
+        uuid.UUID,
+        edgedb_config.Property(db_name="id"),
+        sql_config.Property(path="$current.id"),
+    ]
+    name: T.Annotated[str, edgedb_name, sql_name]
+
+    def friends(self, limit: int | None = None) -> T.Annotated[
+        list["Person"],
+        edgedb_config.Link(db_name="friends", update_qbs=limit_edgedb_friends),
+        sql_config.Link(
+            from_='FROM "Person" $current WHERE $current.id != $parent.id',
+            cardinality=Cardinality.MANY,
+            update_qbs=limit_sql_friends,
+        ),
+    ]:
+        return []
+
+    def pets(self) -> T.Annotated[
+        list[Cat | Dog],
+        sql_config.Link(
+            from_='FROM "Pet" $current WHERE $current.owner_id = $parent.id',
+            cardinality=Cardinality.MANY,
+        ),
+    ]:
+        return []
+
+
+class Query(GQL):
+    @staticmethod
+    async def person(info: Info) -> Person:
+        edgedb_qb = await get_edgedb_qb(info)
+        BUILT["edgedb"] = edgedb_qb.build()
+        sql_qb = await get_sql_qb(info)
+        BUILT["sql"] = sql_qb.build_root()
+        return Person(id=uuid.UUID(int=1), name="a")
+
+
+@pytest.fixture(scope="module")
+def client() -> TestClient:
+    # building the schema twice for the same models in one process does not work
+    app = FastAPI()
+    app.include_router(
+        build_router(query_models=[Query], result_wrappers=[]), prefix="/graphql"
+    )
+    return TestClient(app)
+
+
+QUERY = "{ person { name friends(limit: 3) { id } } }"
+
+
+def test_update_qb_set_after_construction_and_async_update_qbs(client: TestClient):
+    def upper_edgedb(qb: EdgeDBQB) -> None:
+        qb.fields.add("upper_name := str_upper(.full_name)")
+
+    def upper_sql(qb: SQLQB) -> None:
+        qb.sel(name="upper_name", path="upper($current.name)")
+
+    # set after construction, the configs keep nothing built from the old value
+    edgedb_name.update_qb = upper_edgedb
+    sql_name.update_qb = upper_sql
+    try:
+        res = client.post("/graphql", json={"query": QUERY}).json()
+        assert res["errors"] is None
+        edgedb_s, edgedb_v = BUILT["edgedb"]
+        assert "upper_name := str_upper(.full_name)" in edgedb_s
+        # the async update_qbs ran with the limit argument
+        assert "friends: { id } LIMIT <int32>$limit" in edgedb_s
+        assert edgedb_v == {"limit": 3}
+        sql_s, sql_v = BUILT["sql"]
+        assert "'upper_name', upper(_Person.name)" in sql_s
+        assert "LIMIT :limit" in sql_s
+        assert sql_v == {"limit": 3}
+
+        async def upper_sql_async(qb: SQLQB) -> None:
+            qb.sel(name="upper_name_async", path="upper($current.name)")
+
+        # swapping a sync callback for an async one is picked up too
+        sql_name.update_qb = upper_sql_async
+        res = client.post("/graphql", json={"query": QUERY}).json()
+        assert res["errors"] is None
+        assert "upper_name_async" in BUILT["sql"][0]
+    finally:
+        edgedb_name.update_qb = None
+        sql_name.update_qb = None
+
+
+def test_union_link_does_not_grow_cached_nodes(client: TestClient):
+    query = (
+        "{ person { pets { __typename ... on Cat { name } ... on Cat { lives } "
+        "... on Dog { name } } } }"
+    )
+    built = []
+    for _ in range(3):
+        res = client.post("/graphql", json={"query": query}).json()
+        assert res["errors"] is None
+        built.append(BUILT["sql"])
+    # the repeated Cat fragments are combined into one subquery
+    assert (
+        "json_build_object('name', Person__Cat.name, 'lives', Person__Cat.lives)"
+        in built[0][0]
+    )
+    # the cached query is reused, each run must build the same sql
+    assert built[1] == built[0] and built[2] == built[0]
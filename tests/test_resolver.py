@@ -0,0 +1,130 @@
+import datetime
+import enum
+import typing as T
+import uuid
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from pydantic import PlainSerializer, model_serializer
+
+from fastgql import GQL, build_router
+
+
+class Color(enum.Enum):
+    RED = "red"
+    BLUE = "blue"
+
+
+class Price(GQL):
+    amount: int
+    currency: str
+
+    @model_serializer(mode="wrap")
+    def _upper_currency(self, handler):
+        d = handler(self)
+        if "currency" in d:
+            d["currency"] = d["currency"].upper()
+        return d
+
+
+class Pet(GQL):
+    id: uuid.UUID
+    name: str
+    color: Color
+    owner_id: T.Optional[uuid.UUID] = None
+    born: datetime.date | None = None
+    seen_at: datetime.datetime | None = None
+    weight: T.Annotated[float, PlainSerializer(lambda v: round(v, 1))]
+    price: Price
+
+
+PETS = [
+    Pet(
+        id=uuid.UUID(int=1),
+        name="rex",
+        color=Color.RED,
+        owner_id=uuid.UUID(int=9),
+        born=datetime.date(2020, 1, 2),
+        seen_at=datetime.datetime(2021, 3, 4, 5, 6, 7, tzinfo=datetime.timezone.utc),
+        weight=12.345,
+        price=Price(amount=10, currency="usd"),
+    ),
+    Pet(
+        id=uuid.UUID(int=2),
+        name="tom",
+        color=Color.BLUE,
+        weight=3.0,
+        price=Price(amount=5, currency="eur"),
+    ),
+]
+
+
+class Query(GQL):
+    @staticmethod
+    async def pets() -> list[Pet]:
+        return PETS
+
+
+@pytest.fixture(scope="module")
+def client() -> TestClient:
+    app = FastAPI()
+    app.include_router(
+        build_router(query_models=[Query], result_wrappers=[]), prefix="/graphql"
+    )
+    return TestClient(app)
+
+
+def query(client: TestClient, q: str) -> dict[str, T.Any]:
+    res = client.post("/graphql", json={"query": q}).json()
+    assert res["errors"] is None
+    return res["data"]
+
+
+def test_leaves_match_model_dump(client: TestClient):
+    data = query(
+        client,
+        "{ pets { id name color ownerId born seenAt weight price { amount currency } } }",
+    )
+    expected = []
+    for pet in PETS:
+        d = pet.model_dump(mode="json")
+        expected.append(
+            {
+                "id": d["id"],
+                "name": d["name"],
+                "color": d["color"],
+                "ownerId": d["owner_id"],
+                "born": d["born"],
+                "seenAt": d["seen_at"],
+                "weight": d["weight"],
+                "price": d["price"],
+            }
+        )
+    assert data == {"pets": expected}
+    # the serializers ran
+    assert data["pets"][0]["weight"] == 12.3
+    assert data["pets"][0]["price"]["currency"] == "USD"
+    assert data["pets"][0]["seenAt"] == "2021-03-04T05:06:07Z"
+
+
+def test_aliases(client: TestClient):
+    data = query(
+        client,
+        "{ all: pets { ident: id label: name hue: color cost: price { n: amount } } }",
+    )
+    assert data == {
+        "all": [
+            {
+                "ident": pet.model_dump(mode="json")["id"],
+                "label": pet.name,
+                "hue": pet.color.value,
+                "cost": {"n": pet.price.amount},
+            }
+            for pet in PETS
+        ]
+    }
+    # a second run reads from the cached plans
+    assert query(client, "{ all: pets { ident: id } }") == {
+        "all": [{"ident": str(pet.id)} for pet in PETS]
+    }
@@ -0,0 +1,53 @@
+import datetime
+import enum
+import json
+import uuid
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from fastgql import GQL, build_router
+
+SEEN: list[str] = []
+
+
+class Color(enum.Enum):
+    RED = "red"
+
+
+class Thing(GQL):
+    id: uuid.UUID
+    day: datetime.date
+    color: Color
+
+
+class Query(GQL):
+    @staticmethod
+    async def thing() -> Thing:
+        return Thing(id=uuid.UUID(int=1), day=datetime.date(2020, 1, 2), color="red")
+
+
+def dump_result(request_data, res, result_d, request, response):
+    SEEN.append(json.dumps(result_d["data"]))
+    return res
+
+
+def test_result_wrappers_get_json_values():
+    app = FastAPI()
+    app.include_router(
+        build_router(query_models=[Query], result_wrappers=[dump_result]),
+        prefix="/graphql",
+    )
+    res = (
+        TestClient(app)
+        .post("/graphql", json={"query": "{ thing { id day color } }"})
+        .json()
+    )
+    assert res["errors"] is None
+    expected = {
+        "thing": Thing(
+            id=uuid.UUID(int=1), day=datetime.date(2020, 1, 2), color="red"
+        ).model_dump(mode="json")
+    }
+    assert res["data"] == expected
+    assert json.loads(SEEN[0]) == expected
@@ -0,0 +1,84 @@
+import re
+
+import pytest
+
+from fastgql.query_builders.sql.query_builder import (
+    QueryBuilder,
+    split_text_around_where,
+)
+
+
+def split_with_regex(text: str) -> tuple[str, str | None]:
+    parts = re.split(r"(?i)\bwhere\b", text, maxsplit=1)
+    return parts[0].strip(), parts[1].strip() if len(parts) > 1 else None
+
+
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        ('FROM "Person" $current', ('FROM "Person" $current', None)),
+        (
+            'FROM "Person" $current WHERE $current.id = $parent.id',
+            ('FROM "Person" $current', "$current.id = $parent.id"),
+        ),
+        ("FROM a wHeRe b", ("FROM a", "b")),
+        ("FROM a\nwhere\tb", ("FROM a", "b")),
+        # only the first where splits, even inside a subquery
+        (
+            "FROM a $current WHERE $current.id IN (SELECT id FROM b WHERE c)",
+            ("FROM a $current", "$current.id IN (SELECT id FROM b WHERE c)"),
+        ),
+        (
+            "FROM (SELECT * FROM b WHERE c) $current WHERE d",
+            ("FROM (SELECT * FROM b", "c) $current WHERE d"),
+        ),
+        # and inside a string literal, the sql is not parsed
+        (
+            "FROM (SELECT 'where' AS w) $current WHERE d",
+            ("FROM (SELECT '", "' AS w) $current WHERE d"),
+        ),
+        ("FROM a WHERE name = 'where'", ("FROM a", "name = 'where'")),
+        ("FROM a WHERE name = 'somewhere'", ("FROM a", "name = 'somewhere'")),
+        ("FROM nowhere_t WHERE x", ("FROM nowhere_t", "x")),
+        (
+            "FROM where_t, t_where, elsewhere",
+            ("FROM where_t, t_where, elsewhere", None),
+        ),
+        ("WHERE x", ("", "x")),
+        ("FROM a WHERE", ("FROM a", "")),
+        # lowercasing İ changes the length, which falls back to the regex
+        ("FROM İ WHERE x", ("FROM İ", "x")),
+    ],
+)
+def test_split_text_around_where(text: str, expected: tuple[str, str | None]):
+    assert split_text_around_where(text) == expected
+    # the same split the regex it replaced gives
+    assert split_with_regex(text) == expected
+
+
+SQL = "SELECT $a::int, $ab, x::text, $a, $b FROM t WHERE t.c = $ab::uuid"
+PARAMS = {"a": 1, "ab": 2, "b": 3}
+
+
+def test_prepare_query_asyncpg():
+    sql, values = QueryBuilder.prepare_query_asyncpg(SQL, PARAMS)
+    # numbered by first use, a repeated name reuses its number
+    assert sql == "SELECT $1::int, $2, x::text, $1, $3 FROM t WHERE t.c = $2::uuid"
+    assert values == [1, 2, 3]
+    with pytest.raises(KeyError):
+        QueryBuilder.prepare_query_asyncpg("SELECT $missing", PARAMS)
+
+
+def test_prepare_query_psycopg():
+    sql, params = QueryBuilder.prepare_query_psycopg(SQL + " AND t.d = :b", PARAMS)
+    assert sql == (
+        "SELECT %(a)s::int, %(ab)s, x::text, %(a)s, %(b)s FROM t "
+        "WHERE t.c = %(ab)s::uuid AND t.d = %(b)s"
+    )
+    assert params == PARAMS and params is not PARAMS
+
+
+def test_prepare_query_sqlalchemy():
+    sql, params = QueryBuilder.prepare_query_sqlalchemy(SQL, PARAMS)
+    assert sql == "SELECT :a::int, :ab, x::text, :a, :b FROM t WHERE t.c = :ab::uuid"
+    assert params == PARAMS and params is not PARAMS